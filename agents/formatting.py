@@ -0,0 +1,120 @@
+import os
+import re
+from agents.states import QueryState
+
+# "auto": answer common result shapes from a template and only call the LLM for the rest
+# "llm": always use the LLM formatting prompt (original behaviour)
+FORMATTER_AUTO = "auto"
+FORMATTER_LLM = "llm"
+
+RESULT_FORMATTERS = {
+    intent: os.getenv(f"RESULT_FORMATTER_{intent.upper()}", FORMATTER_AUTO)
+    for intent in ("read", "create", "update", "delete")
+}
+TEMPLATE_MAX_ROWS = int(os.getenv("TEMPLATE_MAX_ROWS", "20"))
+TEMPLATE_MAX_COLUMNS = int(os.getenv("TEMPLATE_MAX_COLUMNS", "6"))
+LLM_MAX_RESULT_ROWS = int(os.getenv("LLM_MAX_RESULT_ROWS", "50"))
+
+_AFFECTED = re.compile(r"^Row\(s\) (updated|deleted) successfully\. \((-?\d+) affected\)$")
+_AGGREGATE = re.compile(r"^(count|sum|avg|min|max|total)\s*\((.*)\)$", re.IGNORECASE)
+_NOT_APPROVED = re.compile(r"^(Create|Update|Delete) operation was not approved\.$")
+_TARGET_TABLE = re.compile(r"^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"`\[]?(\w+)", re.IGNORECASE)
+
+
+def _label(column: str) -> str:
+    column = (column or "").strip()
+    aggregate = _AGGREGATE.match(column)
+    if aggregate:
+        function = aggregate.group(1).lower()
+        target = aggregate.group(2).strip()
+        names = {"count": "Count", "sum": "Total", "total": "Total", "avg": "Average", "min": "Minimum", "max": "Maximum"}
+        if function == "count" or not re.fullmatch(r"[\w.]+", target):
+            return names[function]
+        target = target.split(".")[-1].replace("_", " ")
+        return f"{names[function]} {target}"
+    words = column.split(".")[-1].replace("_", " ").strip()
+    return words[:1].upper() + words[1:] if words else "Value"
+
+
+def _value(value) -> str:
+    if value is None:
+        return "none"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, float):
+        return f"{value:,.2f}" if not value.is_integer() else f"{int(value):,}"
+    return str(value)
+
+
+def _format_read(results, columns: list[str]) -> str | None:
+    if isinstance(results, str):
+        return f"Sorry, I couldn't read that data: {results}."
+    if not isinstance(results, list):
+        return None
+    if not results:
+        return "No matching records were found."
+    width = len(results[0])
+    if len(results) > TEMPLATE_MAX_ROWS or width > TEMPLATE_MAX_COLUMNS:
+        return None
+    columns = columns if columns and len(columns) == width else [f"value {i + 1}" for i in range(width)]
+    if len(results) == 1 and width == 1:
+        return f"{_label(columns[0])}: {_value(results[0][0])}."
+    if width == 1:
+        return "\n".join(f"- {_value(row[0])}" for row in results)
+    labels = [_label(column) for column in columns]
+    lines = [", ".join(f"{label}: {_value(value)}" for label, value in zip(labels, row)) for row in results]
+    if len(lines) == 1:
+        return lines[0] + "."
+    return "\n".join(f"- {line}" for line in lines)
+
+
+def _format_write(results, intent: str, query) -> str | None:
+    if not isinstance(results, str):
+        return None
+    if _NOT_APPROVED.match(results):
+        return "The operation was cancelled, so nothing was changed."
+    target = _TARGET_TABLE.match(str(query or ""))
+    where = f" in {target.group(1)}" if target else ""
+    if results == "Row inserted successfully.":
+        return f"Done! The new record was added{f' to {target.group(1)}' if target else ''}."
+    affected = _AFFECTED.match(results)
+    if affected:
+        verb, count = affected.group(1), int(affected.group(2))
+        if count == 0:
+            return f"No matching records were found{where}, so nothing was {verb}."
+        return f"Done! {count:,} record{'s' if count != 1 else ''}{where} {'were' if count != 1 else 'was'} {verb}."
+    return f"Sorry, the {intent} could not be completed: {str(results).rstrip('.')}."
+
+
+def template_answer(state: QueryState, intent: str) -> str | None:
+    # None means the result shape is not one a template expresses well; the caller falls back to the LLM
+    if RESULT_FORMATTERS.get(intent, FORMATTER_AUTO) == FORMATTER_LLM:
+        return None
+    results = state.get("results")
+    if intent == "read":
+        answer = _format_read(results, state.get("columns") or [])
+        if answer is not None and state.get("next_cursor"):
+            answer += f"\n(Showing the first {len(results):,} rows; more are available.)"
+        return answer
+    return _format_write(results, intent, state.get("validated_query"))
+
+
+def record_template_answer(state: QueryState, answer: str) -> QueryState:
+    state["answer"] = answer
+    state["formatter"] = "template"
+    intermediate = state.get("intermediate_steps", [])
+    intermediate.append(("result_formatting", answer))
+    intermediate.append(("formatter", "template"))
+    state["intermediate_steps"] = intermediate
+    return state
+
+
+def results_for_llm(state: QueryState) -> str:
+    # Caps what the formatting prompt sees; the full page stays in state["results"]
+    results = state.get("results")
+    if not isinstance(results, list) or (len(results) <= LLM_MAX_RESULT_ROWS and not state.get("next_cursor")):
+        return str(results)
+    more = "+" if state.get("next_cursor") else ""
+    return f"{results[:LLM_MAX_RESULT_ROWS]} (first {min(len(results), LLM_MAX_RESULT_ROWS)} of {len(results)}{more} rows)"
@@ -1,11 +1,19 @@
-from .nodes.react import reason_and_act_node
+import uuid
+from .nodes.react import reason_and_act_node, reason_and_act_node_async
 from .nodes.read import read_query_generation_node, read_query_validation_node, execute_query_read_node, read_result_formatting_node
+from .nodes.read import read_query_generation_node_async, read_query_validation_node_async, execute_query_read_node_async, read_result_formatting_node_async
 from .nodes.create import create_query_generation_node, create_query_validation_node, create_human_verification_node, execute_query_create_node, create_result_formatting_node
+from .nodes.create import create_query_generation_node_async, create_query_validation_node_async, execute_query_create_node_async, create_result_formatting_node_async
 from .nodes.update import update_query_generation_node, update_query_validation_node, update_human_verification_node, execute_query_update_node, update_result_formatting_node
+from .nodes.update import update_query_generation_node_async, update_query_validation_node_async, execute_query_update_node_async, update_result_formatting_node_async
 from .nodes.delete import delete_query_generation_node, delete_query_validation_node, delete_human_verification_node, execute_query_delete_node, delete_result_formatting_node
+from .nodes.delete import delete_query_generation_node_async, delete_query_validation_node_async, execute_query_delete_node_async, delete_result_formatting_node_async
 from agents.states import QueryState
-from core.llm import llm
+from core.metrics import instrument_node
+from db.checkpoints import aclaim_thread, aforget_thread, arelease_thread, atouch_thread, claim_thread, release_thread
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph
+from langgraph.types import Command
 
 # QUERY CLASSIFICATION
 REASON_AND_ACT_NODE = "reason_and_act_node"
@@ -37,46 +45,74 @@ DELETE_HUMAN_VERIFICATION_NODE = "delete_human_verification_node"
 EXECUTE_QUERY_DELETE_NODE = "execute_query_delete_node"
 DELETE_RESULT_FORMATTING_NODE = "delete_result_formatting_node"
 
+# Node groups used by the streaming API
+EXECUTE_NODES = {EXECUTE_QUERY_NODE, EXECUTE_QUERY_CREATE_NODE, EXECUTE_QUERY_UPDATE_NODE, EXECUTE_QUERY_DELETE_NODE}
+ANSWER_NODES = {RESULT_FORMATTING_NODE, CREATE_RESULT_FORMATTING_NODE, UPDATE_RESULT_FORMATTING_NODE, DELETE_RESULT_FORMATTING_NODE}
+# Where a CUD run waiting for approval is handed from the draft graph to the checkpointed one
+VERIFICATION_NODES = {
+    "create": CREATE_HUMAN_VERIFICATION_NODE,
+    "update": UPDATE_HUMAN_VERIFICATION_NODE,
+    "delete": DELETE_HUMAN_VERIFICATION_NODE,
+}
+
+
+class ApprovalConflict(Exception):
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        super().__init__("This operation is already being approved or rejected by another request")
+
+
+def _node(name, func, afunc=None):
+    # Same node for both modes: app.invoke runs func, app.ainvoke awaits afunc. Both are timed under the graph node name
+    run, arun = instrument_node(name, func, afunc)
+    return RunnableLambda(run, afunc=arun, name=func.__name__)
 
 
 class AgenticCRUDApp:
-    def __init__(self):
+    def __init__(self, checkpointer=None):
+        # With a checkpointer, pending CUD runs pause inside their execute node and are resumed by thread id
+        self.checkpointer = checkpointer
         self.graph = StateGraph(QueryState)
-        self._build_graph()
-        self.app = self.graph.compile()
+        self._build_graph(self.graph, pauses=checkpointer is not None)
+        self.app = self.graph.compile(checkpointer=checkpointer)
+        # New API runs start on this copy, which saves nothing: a READ never touches the checkpoint store,
+        # and a CUD run ends at its verification node and only then moves to self.app (see apause)
+        draft = StateGraph(QueryState)
+        self._build_graph(draft, pauses=False)
+        self.draft_app = draft.compile()
 
-    def _build_graph(self): 
+    def _build_graph(self, graph: StateGraph, pauses: bool):
         # Defining nodes
-        self.graph.add_node(REASON_AND_ACT_NODE, reason_and_act_node)
-        self.graph.set_entry_point(REASON_AND_ACT_NODE)
+        graph.add_node(REASON_AND_ACT_NODE, _node(REASON_AND_ACT_NODE, reason_and_act_node, reason_and_act_node_async))
+        graph.set_entry_point(REASON_AND_ACT_NODE)
 
         # -----READ Nodes-----    
         # Nodes
-        self.graph.add_node(QUERY_GENERATION_NODE, read_query_generation_node)
-        self.graph.add_node(QUERY_VALIDATION_NODE, read_query_validation_node)
-        self.graph.add_node(EXECUTE_QUERY_NODE, execute_query_read_node)
-        self.graph.add_node(RESULT_FORMATTING_NODE, read_result_formatting_node)
+        graph.add_node(QUERY_GENERATION_NODE, _node(QUERY_GENERATION_NODE, read_query_generation_node, read_query_generation_node_async))
+        graph.add_node(QUERY_VALIDATION_NODE, _node(QUERY_VALIDATION_NODE, read_query_validation_node, read_query_validation_node_async))
+        graph.add_node(EXECUTE_QUERY_NODE, _node(EXECUTE_QUERY_NODE, execute_query_read_node, execute_query_read_node_async))
+        graph.add_node(RESULT_FORMATTING_NODE, _node(RESULT_FORMATTING_NODE, read_result_formatting_node, read_result_formatting_node_async))
 
         # -----CREATE Nodes-----
-        self.graph.add_node(CREATE_QUERY_GENERATION_NODE, create_query_generation_node)
-        self.graph.add_node(CREATE_QUERY_VALIDATION_NODE, create_query_validation_node)    
-        self.graph.add_node(CREATE_HUMAN_VERIFICATION_NODE, create_human_verification_node)
-        self.graph.add_node(EXECUTE_QUERY_CREATE_NODE, execute_query_create_node)
-        self.graph.add_node(CREATE_RESULT_FORMATTING_NODE, create_result_formatting_node)
+        graph.add_node(CREATE_QUERY_GENERATION_NODE, _node(CREATE_QUERY_GENERATION_NODE, create_query_generation_node, create_query_generation_node_async))
+        graph.add_node(CREATE_QUERY_VALIDATION_NODE, _node(CREATE_QUERY_VALIDATION_NODE, create_query_validation_node, create_query_validation_node_async))    
+        graph.add_node(CREATE_HUMAN_VERIFICATION_NODE, _node(CREATE_HUMAN_VERIFICATION_NODE, create_human_verification_node))
+        graph.add_node(EXECUTE_QUERY_CREATE_NODE, _node(EXECUTE_QUERY_CREATE_NODE, execute_query_create_node, execute_query_create_node_async))
+        graph.add_node(CREATE_RESULT_FORMATTING_NODE, _node(CREATE_RESULT_FORMATTING_NODE, create_result_formatting_node, create_result_formatting_node_async))
 
         # -----UPDATE Nodes-----
-        self.graph.add_node(UPDATE_QUERY_GENERATION_NODE, update_query_generation_node)
-        self.graph.add_node(UPDATE_QUERY_VALIDATION_NODE, update_query_validation_node)
-        self.graph.add_node(UPDATE_HUMAN_VERIFICATION_NODE, update_human_verification_node)
-        self.graph.add_node(EXECUTE_QUERY_UPDATE_NODE, execute_query_update_node)
-        self.graph.add_node(UPDATE_RESULT_FORMATTING_NODE, update_result_formatting_node)
+        graph.add_node(UPDATE_QUERY_GENERATION_NODE, _node(UPDATE_QUERY_GENERATION_NODE, update_query_generation_node, update_query_generation_node_async))
+        graph.add_node(UPDATE_QUERY_VALIDATION_NODE, _node(UPDATE_QUERY_VALIDATION_NODE, update_query_validation_node, update_query_validation_node_async))
+        graph.add_node(UPDATE_HUMAN_VERIFICATION_NODE, _node(UPDATE_HUMAN_VERIFICATION_NODE, update_human_verification_node))
+        graph.add_node(EXECUTE_QUERY_UPDATE_NODE, _node(EXECUTE_QUERY_UPDATE_NODE, execute_query_update_node, execute_query_update_node_async))
+        graph.add_node(UPDATE_RESULT_FORMATTING_NODE, _node(UPDATE_RESULT_FORMATTING_NODE, update_result_formatting_node, update_result_formatting_node_async))
 
         # -----DELETE Nodes-----
-        self.graph.add_node(DELETE_QUERY_GENERATION_NODE, delete_query_generation_node)
-        self.graph.add_node(DELETE_QUERY_VALIDATION_NODE, delete_query_validation_node)
-        self.graph.add_node(DELETE_HUMAN_VERIFICATION_NODE, delete_human_verification_node)
-        self.graph.add_node(EXECUTE_QUERY_DELETE_NODE, execute_query_delete_node)
-        self.graph.add_node(DELETE_RESULT_FORMATTING_NODE, delete_result_formatting_node)
+        graph.add_node(DELETE_QUERY_GENERATION_NODE, _node(DELETE_QUERY_GENERATION_NODE, delete_query_generation_node, delete_query_generation_node_async))
+        graph.add_node(DELETE_QUERY_VALIDATION_NODE, _node(DELETE_QUERY_VALIDATION_NODE, delete_query_validation_node, delete_query_validation_node_async))
+        graph.add_node(DELETE_HUMAN_VERIFICATION_NODE, _node(DELETE_HUMAN_VERIFICATION_NODE, delete_human_verification_node))
+        graph.add_node(EXECUTE_QUERY_DELETE_NODE, _node(EXECUTE_QUERY_DELETE_NODE, execute_query_delete_node, execute_query_delete_node_async))
+        graph.add_node(DELETE_RESULT_FORMATTING_NODE, _node(DELETE_RESULT_FORMATTING_NODE, delete_result_formatting_node, delete_result_formatting_node_async))
 
         # Routing functions
         def route_based_on_intent(state):
@@ -92,11 +128,37 @@ class AgenticCRUDApp:
                 return DELETE_QUERY_GENERATION_NODE
             return END
 
+        def route_read_generation(state):
+            """Skip READ validation when the single-call self-check already produced a validated query"""
+            if state.get("validated_query"):
+                return EXECUTE_QUERY_NODE
+            return QUERY_VALIDATION_NODE
+
+        def route_create_generation(state):
+            """Skip CREATE validation when the single-call self-check already produced a validated query"""
+            if state.get("validated_query"):
+                return CREATE_HUMAN_VERIFICATION_NODE
+            return CREATE_QUERY_VALIDATION_NODE
+
+        def route_update_generation(state):
+            """Skip UPDATE validation when the single-call self-check already produced a validated query"""
+            if state.get("validated_query"):
+                return UPDATE_HUMAN_VERIFICATION_NODE
+            return UPDATE_QUERY_VALIDATION_NODE
+
+        def route_delete_generation(state):
+            """Skip DELETE validation when the single-call self-check already produced a validated query"""
+            if state.get("validated_query"):
+                return DELETE_HUMAN_VERIFICATION_NODE
+            return DELETE_QUERY_VALIDATION_NODE
+
         def route_create_verification(state):
             """Route based on human verification result for CREATE"""
             human_verified = state.get("human_verified")
             if human_verified is True:
                 return EXECUTE_QUERY_CREATE_NODE
+            elif human_verified is None and pauses:
+                return EXECUTE_QUERY_CREATE_NODE
             else:
                 return END
 
@@ -105,6 +167,8 @@ class AgenticCRUDApp:
             human_verified = state.get("human_verified")
             if human_verified is True:
                 return EXECUTE_QUERY_UPDATE_NODE
+            elif human_verified is None and pauses:
+                return EXECUTE_QUERY_UPDATE_NODE
             else:
                 return END
 
@@ -113,38 +177,40 @@ class AgenticCRUDApp:
             human_verified = state.get("human_verified")
             if human_verified is True:
                 return EXECUTE_QUERY_DELETE_NODE
+            elif human_verified is None and pauses:
+                return EXECUTE_QUERY_DELETE_NODE
             else:
                 return END
 
         # Main routing from reason_and_act_node
-        self.graph.add_conditional_edges(REASON_AND_ACT_NODE, route_based_on_intent)
+        graph.add_conditional_edges(REASON_AND_ACT_NODE, route_based_on_intent)
 
         # READ flow edges
-        self.graph.add_edge(QUERY_VALIDATION_NODE, EXECUTE_QUERY_NODE)
-        self.graph.add_edge(EXECUTE_QUERY_NODE, RESULT_FORMATTING_NODE)
-        self.graph.add_edge(RESULT_FORMATTING_NODE, END)
-        self.graph.add_edge(QUERY_GENERATION_NODE, QUERY_VALIDATION_NODE)
+        graph.add_edge(QUERY_VALIDATION_NODE, EXECUTE_QUERY_NODE)
+        graph.add_edge(EXECUTE_QUERY_NODE, RESULT_FORMATTING_NODE)
+        graph.add_edge(RESULT_FORMATTING_NODE, END)
+        graph.add_conditional_edges(QUERY_GENERATION_NODE, route_read_generation)
 
         # CREATE flow edges
-        self.graph.add_edge(CREATE_QUERY_GENERATION_NODE, CREATE_QUERY_VALIDATION_NODE)
-        self.graph.add_edge(CREATE_QUERY_VALIDATION_NODE, CREATE_HUMAN_VERIFICATION_NODE)
-        self.graph.add_conditional_edges(CREATE_HUMAN_VERIFICATION_NODE, route_create_verification)
-        self.graph.add_edge(EXECUTE_QUERY_CREATE_NODE, CREATE_RESULT_FORMATTING_NODE)
-        self.graph.add_edge(CREATE_RESULT_FORMATTING_NODE, END)
+        graph.add_conditional_edges(CREATE_QUERY_GENERATION_NODE, route_create_generation)
+        graph.add_edge(CREATE_QUERY_VALIDATION_NODE, CREATE_HUMAN_VERIFICATION_NODE)
+        graph.add_conditional_edges(CREATE_HUMAN_VERIFICATION_NODE, route_create_verification)
+        graph.add_edge(EXECUTE_QUERY_CREATE_NODE, CREATE_RESULT_FORMATTING_NODE)
+        graph.add_edge(CREATE_RESULT_FORMATTING_NODE, END)
 
         # UPDATE flow edges
-        self.graph.add_edge(UPDATE_QUERY_GENERATION_NODE, UPDATE_QUERY_VALIDATION_NODE)
-        self.graph.add_edge(UPDATE_QUERY_VALIDATION_NODE, UPDATE_HUMAN_VERIFICATION_NODE)
-        self.graph.add_conditional_edges(UPDATE_HUMAN_VERIFICATION_NODE, route_update_verification)
-        self.graph.add_edge(EXECUTE_QUERY_UPDATE_NODE, UPDATE_RESULT_FORMATTING_NODE)
-        self.graph.add_edge(UPDATE_RESULT_FORMATTING_NODE, END)
+        graph.add_conditional_edges(UPDATE_QUERY_GENERATION_NODE, route_update_generation)
+        graph.add_edge(UPDATE_QUERY_VALIDATION_NODE, UPDATE_HUMAN_VERIFICATION_NODE)
+        graph.add_conditional_edges(UPDATE_HUMAN_VERIFICATION_NODE, route_update_verification)
+        graph.add_edge(EXECUTE_QUERY_UPDATE_NODE, UPDATE_RESULT_FORMATTING_NODE)
+        graph.add_edge(UPDATE_RESULT_FORMATTING_NODE, END)
 
         # DELETE flow edges
-        self.graph.add_edge(DELETE_QUERY_GENERATION_NODE, DELETE_QUERY_VALIDATION_NODE)
-        self.graph.add_edge(DELETE_QUERY_VALIDATION_NODE, DELETE_HUMAN_VERIFICATION_NODE)
-        self.graph.add_conditional_edges(DELETE_HUMAN_VERIFICATION_NODE, route_delete_verification)
-        self.graph.add_edge(EXECUTE_QUERY_DELETE_NODE, DELETE_RESULT_FORMATTING_NODE)
-        self.graph.add_edge(DELETE_RESULT_FORMATTING_NODE, END)
+        graph.add_conditional_edges(DELETE_QUERY_GENERATION_NODE, route_delete_generation)
+        graph.add_edge(DELETE_QUERY_VALIDATION_NODE, DELETE_HUMAN_VERIFICATION_NODE)
+        graph.add_conditional_edges(DELETE_HUMAN_VERIFICATION_NODE, route_delete_verification)
+        graph.add_edge(EXECUTE_QUERY_DELETE_NODE, DELETE_RESULT_FORMATTING_NODE)
+        graph.add_edge(DELETE_RESULT_FORMATTING_NODE, END)
 
     def run_agent(self, input_data: dict) -> dict:
         # Accepts initial state dict and runs the entire workflow
@@ -154,12 +220,83 @@ class AgenticCRUDApp:
             "query": None,
             "validated_query": None,
             "results": None,
+            "columns": None,
+            "next_cursor": None,
             "answer": None,
+            "formatter": None,
             "human_verified": input_data.get("human_verified"),
             "verification_required": False,
             "intermediate_steps": []
         }
-        result = self.app.invoke(state)
+        config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+        result = self.app.invoke(state, config)
+        return result
+
+    def resume(self, thread_id: str, human_verified: bool) -> dict | None:
+        # Continues a paused CUD run with the validated_query the human saw, skipping classification/generation/validation
+        config = {"configurable": {"thread_id": thread_id}}
+        if not self.app.get_state(config).next:
+            return None
+        if not claim_thread(self.checkpointer, thread_id):
+            raise ApprovalConflict(thread_id)
+        try:
+            return self.app.invoke(Command(resume=human_verified), config)
+        except BaseException:
+            release_thread(self.checkpointer, thread_id)
+            raise
+
+    async def aclaim(self, thread_id: str) -> bool:
+        # False when nothing is paused under thread_id. Raises ApprovalConflict when another approval of the
+        # same run claimed it first, so the execute node can't run twice
+        config = {"configurable": {"thread_id": thread_id}}
+        if not (await self.app.aget_state(config)).next:
+            return False
+        if not await aclaim_thread(self.checkpointer, thread_id):
+            raise ApprovalConflict(thread_id)
+        return True
+
+    async def arelease(self, thread_id: str):
+        await arelease_thread(self.checkpointer, thread_id)
+
+    async def arun(self, state: dict, thread_id: str) -> dict:
+        # API entry point for a new run: only a run paused for approval keeps its checkpoints
+        return await self.apause(await self.draft_app.ainvoke(state), thread_id)
+
+    async def apause(self, result: dict, thread_id: str) -> dict:
+        # Saves a finished draft run that waits for approval under thread_id, as if self.app had just run its
+        # verification node, then runs it up to the interrupt in the execute node. Anything else is returned as is
+        node = VERIFICATION_NODES.get(result.get("intent"))
+        if node is None or self.checkpointer is None or not result.get("verification_required") or result.get("human_verified") is not None:
+            return result
+        config = {"configurable": {"thread_id": thread_id}}
+        await atouch_thread(self.checkpointer, thread_id)
+        try:
+            await self.app.aupdate_state(config, result, as_node=node)
+            result = await self.app.ainvoke(None, config)
+        except BaseException:
+            await aforget_thread(self.checkpointer, thread_id)
+            raise
+        await self.asettle(thread_id)
+        return result
+
+    async def asettle(self, thread_id: str):
+        # After a run stops: a paused one restarts its TTL, anything else is deleted
+        config = {"configurable": {"thread_id": thread_id}}
+        if (await self.app.aget_state(config)).next:
+            await atouch_thread(self.checkpointer, thread_id)
+        else:
+            await aforget_thread(self.checkpointer, thread_id)
+
+    async def aresume(self, thread_id: str, human_verified: bool) -> dict | None:
+        if not await self.aclaim(thread_id):
+            return None
+        config = {"configurable": {"thread_id": thread_id}}
+        try:
+            result = await self.app.ainvoke(Command(resume=human_verified), config)
+        except BaseException:
+            await self.arelease(thread_id)
+            raise
+        await self.asettle(thread_id)
         return result
     
     def main(self):
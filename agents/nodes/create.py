@@ -1,12 +1,21 @@
-import sqlite3
 from agents.states import QueryState
-from core.llm import llm
-from core.prompts import create_query_generation_prompt, create_query_validation_prompt, create_result_formatting_prompt, schema
+from agents.formatting import template_answer, record_template_answer
+from agents.pipeline import PIPELINE_SINGLE_CALL, pipeline_mode, record_checked_generation, local_validation, record_local_validation, query_for_llm_repair
+from core.llm import get_llm
+from agents.schema_context import prompt_schema
+from db.result_cache import result_cache
+from db.write_queue import execute_write
+from db.executor import run_in_db_executor
+from core.prompts import create_query_generation_prompt, create_query_generation_checked_prompt, create_query_validation_prompt, create_result_formatting_prompt
 from agents.nodes.read import strip_sql_code_fences
+from langgraph.types import interrupt
 
 def create_query_generation_node(state: QueryState) -> QueryState:
     input_text = state.get("input")
-    generated_query = llm.invoke(create_query_generation_prompt.format(input=input_text, schema=schema))
+    if pipeline_mode("create") == PIPELINE_SINGLE_CALL:
+        response = get_llm("generation", "create").invoke(create_query_generation_checked_prompt.format(input=input_text, schema=prompt_schema(input_text, "create")))
+        return record_checked_generation(state, response, "create", "create_query_generation")
+    generated_query = get_llm("generation", "create").invoke(create_query_generation_prompt.format(input=input_text, schema=prompt_schema(input_text, "create")))
     query = generated_query.content if hasattr(generated_query, 'content') else str(generated_query)
     state["query"] = query
     intermediate = state.get("intermediate_steps", [])
@@ -17,7 +26,13 @@ def create_query_generation_node(state: QueryState) -> QueryState:
 def create_query_validation_node(state: QueryState) -> QueryState:
     query = state.get("query")
     input_text = state.get('input')
-    validated_query = llm.invoke(create_query_validation_prompt.format(input=input_text, query=query, schema=schema))
+    # SQLite checks the statement locally; the LLM is only asked to repair what it rejects
+    checked = local_validation(query, "create")
+    if checked is not None and checked.ok:
+        return record_local_validation(state, checked, "create_query_validation")
+    if checked is not None:
+        query = query_for_llm_repair(state, checked)
+    validated_query = get_llm("validation", "create").invoke(create_query_validation_prompt.format(input=input_text, query=query, schema=prompt_schema(input_text, "create")))
     validated_query_str = validated_query.content if hasattr(validated_query, 'content') else str(validated_query)
     state["validated_query"] = validated_query_str
     intermediate = state.get("intermediate_steps", [])
@@ -41,6 +56,10 @@ def create_human_verification_node(state: QueryState) -> QueryState:
     return state
 
 def execute_query_create_node(state: QueryState) -> QueryState:
+    # Checkpointed mode only: pause here until the approval for the stored query comes back
+    if state.get("human_verified") is None:
+        state["human_verified"] = interrupt({"validated_query": state.get("validated_query"), "intent": state.get("intent")})
+        state["verification_required"] = False
     if not state.get("human_verified", False):
         state["results"] = "Create operation was not approved."
     else:
@@ -50,11 +69,8 @@ def execute_query_create_node(state: QueryState) -> QueryState:
         query = strip_sql_code_fences(query)
         results = None
         try:
-            conn = sqlite3.connect("data/apps.db")
-            c = conn.cursor()
-            c.execute(query)
-            conn.commit()
-            conn.close()
+            execute_write(query, "create")
+            result_cache.invalidate_for_write(query, "create")
             results = "Row inserted successfully."
         except Exception as e:
             results = str(e)
@@ -66,9 +82,61 @@ def execute_query_create_node(state: QueryState) -> QueryState:
 
 def create_result_formatting_node(state: QueryState) -> QueryState:
     results = state.get('results')
-    formatted_answer = llm.invoke(create_result_formatting_prompt.format(results=results))
+    # Simple result shapes are phrased from a template; only the rest costs an LLM call
+    answer = template_answer(state, "create")
+    if answer is not None:
+        return record_template_answer(state, answer)
+    formatted_answer = get_llm("formatting", "create").invoke(create_result_formatting_prompt.format(results=results))
     answer_content = formatted_answer.content if hasattr(formatted_answer, 'content') else str(formatted_answer)
     state["answer"] = answer_content
+    state["formatter"] = "llm"
+    intermediate = state.get("intermediate_steps", [])
+    intermediate.append(("result_formatting", answer_content))
+    state["intermediate_steps"] = intermediate
+    return state
+
+
+async def create_query_generation_node_async(state: QueryState) -> QueryState:
+    input_text = state.get("input")
+    if pipeline_mode("create") == PIPELINE_SINGLE_CALL:
+        response = await get_llm("generation", "create").ainvoke(create_query_generation_checked_prompt.format(input=input_text, schema=await run_in_db_executor(prompt_schema, input_text, "create")))
+        return await run_in_db_executor(record_checked_generation, state, response, "create", "create_query_generation")
+    generated_query = await get_llm("generation", "create").ainvoke(create_query_generation_prompt.format(input=input_text, schema=await run_in_db_executor(prompt_schema, input_text, "create")))
+    query = generated_query.content if hasattr(generated_query, 'content') else str(generated_query)
+    state["query"] = query
+    intermediate = state.get("intermediate_steps", [])
+    intermediate.append(("create_query_generation", query))
+    state["intermediate_steps"] = intermediate
+    return state
+
+async def create_query_validation_node_async(state: QueryState) -> QueryState:
+    query = state.get("query")
+    input_text = state.get("input")
+    checked = await run_in_db_executor(local_validation, query, "create")
+    if checked is not None and checked.ok:
+        return record_local_validation(state, checked, "create_query_validation")
+    if checked is not None:
+        query = query_for_llm_repair(state, checked)
+    validated_query = await get_llm("validation", "create").ainvoke(create_query_validation_prompt.format(input=input_text, query=query, schema=await run_in_db_executor(prompt_schema, input_text, "create")))
+    validated_query_str = validated_query.content if hasattr(validated_query, 'content') else str(validated_query)
+    state["validated_query"] = validated_query_str
+    intermediate = state.get("intermediate_steps", [])
+    intermediate.append(("create_query_validation", validated_query_str))
+    state["intermediate_steps"] = intermediate
+    return state
+
+async def execute_query_create_node_async(state: QueryState) -> QueryState:
+    return await run_in_db_executor(execute_query_create_node, state)
+
+async def create_result_formatting_node_async(state: QueryState) -> QueryState:
+    results = state.get('results')
+    answer = template_answer(state, "create")
+    if answer is not None:
+        return record_template_answer(state, answer)
+    formatted_answer = await get_llm("formatting", "create").ainvoke(create_result_formatting_prompt.format(results=results))
+    answer_content = formatted_answer.content if hasattr(formatted_answer, 'content') else str(formatted_answer)
+    state["answer"] = answer_content
+    state["formatter"] = "llm"
     intermediate = state.get("intermediate_steps", [])
     intermediate.append(("result_formatting", answer_content))
     state["intermediate_steps"] = intermediate
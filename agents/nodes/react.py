@@ -1,16 +1,42 @@
 from agents.states import QueryState
-from core.llm import llm
+from core.intent import INTENT_FAST_PATH_ENABLED, classify_intent
+from core.llm import get_llm
 from core.prompts import intent_classification_prompt
 
 def reason_and_act_node(state: QueryState) -> QueryState:
     user_input = state.get("input")
-    # Get the predicted intent from LLM
-    intent_response = llm.invoke(intent_classification_prompt.format(input=user_input))
-    intent_text = intent_response.content if hasattr(intent_response, "content") else str(intent_response)
-    intent = intent_text.strip().lower()
+    steps = state.get('intermediate_steps', [])
+    # Obvious requests are classified locally; only ambiguous ones cost an LLM round trip
+    fast = classify_intent(user_input) if INTENT_FAST_PATH_ENABLED else None
+    if fast is not None:
+        intent, confidence = fast
+        steps.append(("intent_classifier", f"rules ({confidence:.2f})"))
+    else:
+        # Get the predicted intent from LLM
+        intent_response = get_llm("intent").invoke(intent_classification_prompt.format(input=user_input))
+        intent_text = intent_response.content if hasattr(intent_response, "content") else str(intent_response)
+        intent = intent_text.strip().lower()
+        steps.append(("intent_classifier", "llm"))
     # Add step to intermediate_steps
+    steps.append(("intent_classification", intent))
+    state['intent'] = intent
+    state['intermediate_steps'] = steps
+    return state
+
+
+async def reason_and_act_node_async(state: QueryState) -> QueryState:
+    user_input = state.get("input")
     steps = state.get('intermediate_steps', [])
+    fast = classify_intent(user_input) if INTENT_FAST_PATH_ENABLED else None
+    if fast is not None:
+        intent, confidence = fast
+        steps.append(("intent_classifier", f"rules ({confidence:.2f})"))
+    else:
+        intent_response = await get_llm("intent").ainvoke(intent_classification_prompt.format(input=user_input))
+        intent_text = intent_response.content if hasattr(intent_response, "content") else str(intent_response)
+        intent = intent_text.strip().lower()
+        steps.append(("intent_classifier", "llm"))
     steps.append(("intent_classification", intent))
     state['intent'] = intent
     state['intermediate_steps'] = steps
-    return state
\ No newline at end of file
+    return state
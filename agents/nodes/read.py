@@ -1,25 +1,29 @@
-import sqlite3
+import time
 from agents.states import QueryState
-from core.llm import llm
-from core.prompts import intent_classification_prompt, read_query_generation_prompt, read_query_validation_prompt, read_result_formatting_prompt, schema
-
-def reason_and_act_node(state: QueryState) -> QueryState:
-    user_input = state.get("input")
-    # Get the predicted intent from LLM
-    intent_response = llm.invoke(intent_classification_prompt.format(input=user_input))
-    intent_text = intent_response.content if hasattr(intent_response, "content") else str(intent_response)
-    intent = intent_text.strip().lower()
-    # Add step to intermediate_steps
-    steps = state.get('intermediate_steps', [])
-    steps.append(("intent_classification", intent))
-    state['intent'] = intent
-    state['intermediate_steps'] = steps
-    return state
+from agents.formatting import template_answer, record_template_answer, results_for_llm
+from agents.template_cache import cached_read_query, remember_read_query
+from agents.pipeline import PIPELINE_SINGLE_CALL, pipeline_mode, record_checked_generation, local_validation, record_local_validation, query_for_llm_repair
+from core.llm import get_llm
+from agents.schema_context import prompt_schema
+from db.columnar import execute_read
+from db.result_cache import result_cache
+from db.index_advisor import index_advisor
+from db.executor import run_in_db_executor
+from db.pagination import READ_PAGE_SIZE, encode_cursor
+from db.sql_validator import clean_sql
+from core.prompts import read_query_generation_prompt, read_query_generation_checked_prompt, read_query_validation_prompt, read_result_formatting_prompt
 
 def read_query_generation_node(state: QueryState) -> QueryState:
     # Get the user input
     input_text = state.get('input')
-    sql_query = llm.invoke(read_query_generation_prompt.format(input=input_text, schema=schema))
+    # Questions that only differ in literals from an earlier one reuse its validated SQL
+    if cached_read_query(state):
+        return state
+    if pipeline_mode("read") == PIPELINE_SINGLE_CALL:
+        response = get_llm("generation", "read").invoke(read_query_generation_checked_prompt.format(input=input_text, schema=prompt_schema(input_text, "read")))
+        return record_checked_generation(state, response, "read", "query_generation")
+    generated_query = get_llm("generation", "read").invoke(read_query_generation_prompt.format(input=input_text, schema=prompt_schema(input_text, "read")))
+    sql_query = generated_query.content if hasattr(generated_query, 'content') else str(generated_query)
     # Update state
     state["query"] = sql_query
     intermediate = state.get('intermediate_steps', [])
@@ -30,7 +34,13 @@ def read_query_generation_node(state: QueryState) -> QueryState:
 def read_query_validation_node(state: QueryState) -> QueryState:
     query = state.get('query')
     input_text = state.get('input')
-    validated_query_obj = llm.invoke(read_query_validation_prompt.format(input=input_text, query=query, schema=schema))
+    # SQLite checks the statement locally; the LLM is only asked to repair what it rejects
+    checked = local_validation(query, "read")
+    if checked is not None and checked.ok:
+        return record_local_validation(state, checked, "query_validation")
+    if checked is not None:
+        query = query_for_llm_repair(state, checked)
+    validated_query_obj = get_llm("validation", "read").invoke(read_query_validation_prompt.format(input=input_text, query=query, schema=prompt_schema(input_text, "read")))
     # Extract raw string
     validated_query = (
         validated_query_obj.content if hasattr(validated_query_obj, "content") else validated_query_obj
@@ -46,20 +56,7 @@ def read_query_validation_node(state: QueryState) -> QueryState:
     return state
 
 def strip_sql_code_fences(sql: str) -> str:
-    if not sql:
-        return ""
-    sql = sql.strip()
-    
-    # Remove triple backticks and optional 'sql' marker
-    if sql.startswith("```sql"):
-        sql = sql[len("```sql"):].strip()
-    elif sql.startswith("```"):
-        sql = sql[len("```"):].strip()
-    
-    if sql.endswith("```"):
-        sql = sql[:-len("```")].strip()
-    
-    return sql
+    return clean_sql(sql)
 
 
 def execute_query_read_node(state: QueryState) -> QueryState:
@@ -71,16 +68,30 @@ def execute_query_read_node(state: QueryState) -> QueryState:
     query = strip_sql_code_fences(query)
     
     results = None
-    try:
-        conn = sqlite3.connect("data/apps.db")
-        c = conn.cursor()
-        c.execute(query)
-        results = c.fetchall()
-        conn.close()
-    except Exception as e:
-        results = str(e)
+    engine = None
+    cached = result_cache.get(query)
+    if cached is not None:
+        state["columns"], results, has_more = cached
+        state["next_cursor"] = encode_cursor(query, len(results)) if has_more else None
+    else:
+        generation = result_cache.generation()
+        try:
+            started = time.perf_counter()
+            state["columns"], results, has_more, engine = execute_read(query, READ_PAGE_SIZE)
+            state["next_cursor"] = encode_cursor(query, len(results)) if has_more else None
+            result_cache.put(query, state["columns"], results, has_more, generation)
+            if engine == "sqlite":
+                index_advisor.observe(query, (time.perf_counter() - started) * 1000)
+        except Exception as e:
+            results = str(e)
+    if isinstance(results, list):
+        remember_read_query(state, query)
     
     intermediate = state.get('intermediate_steps', [])
+    if cached is not None:
+        intermediate.append(("result_cache", "hit"))
+    elif engine == "duckdb":
+        intermediate.append(("read_engine", engine))
     intermediate.append(("execute_query", str(results)))
     state["results"] = results
     state["intermediate_steps"] = intermediate
@@ -89,7 +100,11 @@ def execute_query_read_node(state: QueryState) -> QueryState:
 
 def read_result_formatting_node(state: QueryState) -> QueryState:
     results = state.get('results')
-    formatted_answer = llm.invoke(read_result_formatting_prompt.format(results=results))
+    # Simple result shapes are phrased from a template; only the rest costs an LLM call
+    answer = template_answer(state, "read")
+    if answer is not None:
+        return record_template_answer(state, answer)
+    formatted_answer = get_llm("formatting", "read").invoke(read_result_formatting_prompt.format(results=results_for_llm(state)))
     
     if hasattr(formatted_answer, 'content'):
         answer_content = formatted_answer.content
@@ -97,8 +112,62 @@ def read_result_formatting_node(state: QueryState) -> QueryState:
         answer_content = str(formatted_answer)
     
     state["answer"] = answer_content
+    state["formatter"] = "llm"
     intermediate = state.get('intermediate_steps', [])
     intermediate.append(("result_formatting", answer_content))
     state["intermediate_steps"] = intermediate
 
     return state
+
+
+async def read_query_generation_node_async(state: QueryState) -> QueryState:
+    input_text = state.get('input')
+    if await run_in_db_executor(cached_read_query, state):
+        return state
+    if pipeline_mode("read") == PIPELINE_SINGLE_CALL:
+        response = await get_llm("generation", "read").ainvoke(read_query_generation_checked_prompt.format(input=input_text, schema=await run_in_db_executor(prompt_schema, input_text, "read")))
+        return await run_in_db_executor(record_checked_generation, state, response, "read", "query_generation")
+    generated_query = await get_llm("generation", "read").ainvoke(read_query_generation_prompt.format(input=input_text, schema=await run_in_db_executor(prompt_schema, input_text, "read")))
+    sql_query = generated_query.content if hasattr(generated_query, 'content') else str(generated_query)
+    state["query"] = sql_query
+    intermediate = state.get('intermediate_steps', [])
+    intermediate.append(("query_generation", sql_query))
+    state["intermediate_steps"] = intermediate
+    return state
+
+async def read_query_validation_node_async(state: QueryState) -> QueryState:
+    query = state.get('query')
+    input_text = state.get('input')
+    checked = await run_in_db_executor(local_validation, query, "read")
+    if checked is not None and checked.ok:
+        return record_local_validation(state, checked, "query_validation")
+    if checked is not None:
+        query = query_for_llm_repair(state, checked)
+    validated_query_obj = await get_llm("validation", "read").ainvoke(read_query_validation_prompt.format(input=input_text, query=query, schema=await run_in_db_executor(prompt_schema, input_text, "read")))
+    validated_query = (
+        validated_query_obj.content if hasattr(validated_query_obj, "content") else validated_query_obj
+    )
+    if isinstance(validated_query, str):
+        validated_query = validated_query.replace("``````", "").strip()
+    state["validated_query"] = validated_query
+    intermediate = state.get('intermediate_steps', [])
+    intermediate.append(("query_validation", validated_query))
+    state["intermediate_steps"] = intermediate
+    return state
+
+async def execute_query_read_node_async(state: QueryState) -> QueryState:
+    return await run_in_db_executor(execute_query_read_node, state)
+
+async def read_result_formatting_node_async(state: QueryState) -> QueryState:
+    results = state.get('results')
+    answer = template_answer(state, "read")
+    if answer is not None:
+        return record_template_answer(state, answer)
+    formatted_answer = await get_llm("formatting", "read").ainvoke(read_result_formatting_prompt.format(results=results_for_llm(state)))
+    answer_content = formatted_answer.content if hasattr(formatted_answer, 'content') else str(formatted_answer)
+    state["answer"] = answer_content
+    state["formatter"] = "llm"
+    intermediate = state.get('intermediate_steps', [])
+    intermediate.append(("result_formatting", answer_content))
+    state["intermediate_steps"] = intermediate
+    return state
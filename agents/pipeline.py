@@ -0,0 +1,81 @@
+import json
+import os
+import re
+from agents.states import QueryState
+from db.sql_validator import LOCAL_SQL_VALIDATION_ENABLED, ValidationResult, clean_sql, validate_sql
+
+# "two_step": generation node then LLM validation node (original behaviour)
+# "single_call": one generation call that also self-checks; the validation node only runs when needed
+PIPELINE_TWO_STEP = "two_step"
+PIPELINE_SINGLE_CALL = "single_call"
+
+_DEFAULT_MODES = {"read": PIPELINE_SINGLE_CALL, "create": PIPELINE_TWO_STEP, "update": PIPELINE_TWO_STEP, "delete": PIPELINE_TWO_STEP}
+SQL_PIPELINE_MODES = {
+    intent: os.getenv(f"SQL_PIPELINE_MODE_{intent.upper()}", default)
+    for intent, default in _DEFAULT_MODES.items()
+}
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def pipeline_mode(intent: str) -> str:
+    return SQL_PIPELINE_MODES.get(intent, PIPELINE_TWO_STEP)
+
+
+def parse_checked_sql(text: str) -> tuple[str, str]:
+    # Returns (sql, verdict); anything that is not the expected JSON counts as uncertain
+    text = (text or "").strip()
+    match = _JSON_OBJECT.search(text)
+    if match:
+        try:
+            payload = json.loads(match.group(0))
+            sql = str(payload.get("sql", "")).strip()
+            verdict = str(payload.get("verdict", "uncertain")).strip().lower()
+            return sql, verdict if verdict in ("valid", "uncertain") else "uncertain"
+        except (json.JSONDecodeError, AttributeError):
+            pass
+    return text, "uncertain"
+
+
+def passes_local_checks(sql: str, intent: str) -> bool:
+    if not LOCAL_SQL_VALIDATION_ENABLED:
+        return bool(sql)
+    return validate_sql(sql, intent).ok
+
+
+def record_checked_generation(state: QueryState, response, intent: str, step_name: str) -> QueryState:
+    content = response.content if hasattr(response, "content") else str(response)
+    sql, verdict = parse_checked_sql(content)
+    sql = clean_sql(sql)
+    passed = verdict == "valid" and passes_local_checks(sql, intent)
+    state["query"] = sql
+    # A filled validated_query tells the graph to skip the validation node
+    state["validated_query"] = sql if passed else None
+    intermediate = state.get("intermediate_steps", [])
+    intermediate.append((step_name, sql))
+    intermediate.append(("self_check", verdict if passed else f"{verdict}, needs validation"))
+    state["intermediate_steps"] = intermediate
+    return state
+
+
+def local_validation(query, intent: str) -> ValidationResult | None:
+    # None when disabled, so validation nodes fall back to the LLM exactly as before
+    if not LOCAL_SQL_VALIDATION_ENABLED:
+        return None
+    return validate_sql(query, intent)
+
+
+def record_local_validation(state: QueryState, checked: ValidationResult, step_name: str) -> QueryState:
+    state["validated_query"] = checked.sql
+    intermediate = state.get("intermediate_steps", [])
+    intermediate.append((step_name, checked.sql))
+    intermediate.append(("local_validation", "ok"))
+    state["intermediate_steps"] = intermediate
+    return state
+
+
+def query_for_llm_repair(state: QueryState, checked: ValidationResult) -> str:
+    # The LLM validator only sees the query text, so the problems travel along as an SQL comment
+    problems = "; ".join(checked.errors)
+    state.get("intermediate_steps", []).append(("local_validation", problems))
+    return f"{checked.sql}\n-- Problems found by the SQLite validator: {problems}"
@@ -0,0 +1,89 @@
+import logging
+import os
+import re
+from functools import lru_cache
+from db.schema import get_schema
+
+SCHEMA_PRUNING_ENABLED = os.getenv("SCHEMA_PRUNING", "1") == "1"
+# Columns are only pruned from READ prompts, and only for tables wider than this
+SCHEMA_PRUNE_COLUMNS_ABOVE = int(os.getenv("SCHEMA_PRUNE_COLUMNS_ABOVE", "8"))
+SCHEMA_TOKEN_ENCODING = os.getenv("SCHEMA_TOKEN_ENCODING", "o200k_base")
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_GENERIC_PARTS = {"id", "at", "is", "by", "of", "to", "on", "in"}
+_encoding = None
+
+
+def _forms(word: str) -> set[str]:
+    forms = {word, word + "s", word + "es"}
+    if word.endswith("ies"):
+        forms.add(word[:-3] + "y")
+    elif word.endswith("s"):
+        forms.add(word[:-1])
+    if word.endswith("y"):
+        forms.add(word[:-1] + "ies")
+    return forms
+
+
+@lru_cache(maxsize=256)
+def count_tokens(text: str) -> int:
+    global _encoding
+    try:
+        if _encoding is None:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(SCHEMA_TOKEN_ENCODING)
+        return len(_encoding.encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+def _mentions(column: str, text: str, words: set[str]) -> bool:
+    if column.replace("_", " ") in text or column in words:
+        return True
+    for part in column.split("_"):
+        if part in _GENERIC_PARTS:
+            continue
+        # Longer parts also match inside words ("inactive" keeps is_active)
+        if part in words or (len(part) >= 4 and any(part in word for word in words)):
+            return True
+    return False
+
+
+def relevant_schema(question: str, schema, intent: str) -> tuple[set[str], dict[str, set[str]]]:
+    text = " ".join(_WORD.findall((question or "").lower()))
+    words = set(text.split())
+    tables = {table for table in schema.tables if _forms(table) & words or table.replace("_", " ") in text}
+    if not tables:
+        tables = {table for table, columns in schema.tables.items() if any(_mentions(column, text, words) for column in columns)}
+    if not tables:
+        return set(schema.tables), {}
+    matched = set(tables)
+    for table in matched:
+        tables |= schema.neighbours(table)
+    columns = {}
+    if intent == "read":
+        for table in matched:
+            names = schema.tables[table]
+            mentioned = {name for name in names if _mentions(name, text, words)}
+            if len(names) <= SCHEMA_PRUNE_COLUMNS_ABOVE or not mentioned:
+                continue
+            keys = set(schema.primary_keys.get(table, [])) | {column for column, _, _ in schema.foreign_keys.get(table, [])}
+            columns[table] = mentioned | keys
+    return tables, columns
+
+
+def prompt_schema(question: str, intent: str) -> str:
+    # The schema text pasted into generation/validation prompts, cut down to what the question can touch
+    schema = get_schema()
+    full = schema.describe()
+    if not SCHEMA_PRUNING_ENABLED:
+        return full
+    tables, columns = relevant_schema(question, schema, intent)
+    pruned = schema.describe(tables, columns)
+    logger.info(
+        "schema %s for %s: %d -> %d tokens (%s)",
+        schema.digest, intent, count_tokens(full), count_tokens(pruned), ", ".join(sorted(tables))
+    )
+    return pruned
@@ -7,7 +7,10 @@ class QueryState(TypedDict):
     query: str | None
     validated_query: str | None
     results: str | list | None
+    columns: list[str] | None
+    next_cursor: str | None
     answer: str | None
+    formatter: Literal["template", "llm"] | None
     human_verified: bool | None
     verification_required: bool
     intermediate_steps: Annotated[list[tuple[str, str]], operator.add]
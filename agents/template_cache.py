@@ -0,0 +1,225 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from core.metrics import record_cache_hit
+from db.connection import get_pool
+from db.schema import get_schema
+from db.sql_validator import validate_sql
+
+TEMPLATE_CACHE_ENABLED = os.getenv("TEMPLATE_CACHE", "1") == "1"
+TEMPLATE_CACHE_SIZE = int(os.getenv("TEMPLATE_CACHE_SIZE", "512"))
+# Column values recognised as entity names in questions; columns with more distinct values than the limit are skipped
+TEMPLATE_ENTITY_COLUMNS = os.getenv("TEMPLATE_ENTITY_COLUMNS", "users.name,products.name,products.category,orders.order_status")
+TEMPLATE_ENTITY_LIMIT = int(os.getenv("TEMPLATE_ENTITY_LIMIT", "10000"))
+TEMPLATE_ENTITY_REFRESH_SECONDS = float(os.getenv("TEMPLATE_ENTITY_REFRESH_SECONDS", "300"))
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_QUOTED = re.compile(r"'([^']+)'|\"([^\"]+)\"")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_SQL_TOKEN = re.compile(r"'(?:[^']|'')*'|(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+_MARKER = "\x00{}\x00"
+_MARKER_PATTERN = re.compile("\x00(\\d+)\x00")
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class QueryTemplateCache:
+    # Maps a question with its literals replaced by slots to validated SQL with the same slots, per schema version
+    def __init__(self, size: int = TEMPLATE_CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._schema_version = None
+        self._entities = None
+        self._entity_values = {}
+        self._entities_loaded_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def normalize(self, text: str) -> tuple[str, list[tuple[str, str]]]:
+        # Returns (template, slots) where slots are (kind, literal) in order of appearance
+        found = []
+
+        def take(kind):
+            def replace(match):
+                value = next((group for group in match.groups() if group is not None), match.group(0))
+                if kind == "entity":
+                    # Bind the value as stored, not as typed, so "books" still matches category 'Books'
+                    value = self._entity_values.get(value.lower(), value)
+                found.append((kind, value))
+                return f" <{kind}{len(found) - 1}> "
+            return replace
+
+        text = _EMAIL.sub(take("email"), text or "")
+        text = _QUOTED.sub(take("text"), text)
+        entities = self._entity_pattern()
+        if entities is not None:
+            text = entities.sub(take("entity"), text)
+        text = _NUMBER.sub(take("number"), text)
+        template = " ".join(text.lower().split()).rstrip("?.! ")
+        return template, found
+
+    def lookup(self, text: str) -> str | None:
+        if not TEMPLATE_CACHE_ENABLED:
+            return None
+        self._check_schema()
+        template, slots = self.normalize(text)
+        with self._lock:
+            entry = self._entries.get((self._schema_version, template))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((self._schema_version, template))
+        sql = self._bind(entry, slots)
+        if sql is None or not validate_sql(sql, "read").ok:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return sql
+
+    def store(self, text: str, sql: str) -> bool:
+        # Only stored when every slot literal appears exactly once in the SQL, so binding can't change its meaning
+        if not TEMPLATE_CACHE_ENABLED or not sql:
+            return False
+        self._check_schema()
+        template, slots = self.normalize(text)
+        entry = self._parameterize(sql, slots)
+        if entry is None:
+            return False
+        with self._lock:
+            self._entries[(self._schema_version, template)] = entry
+            self._entries.move_to_end((self._schema_version, template))
+            self.stores += 1
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._entities = None
+
+    def _check_schema(self):
+        version = get_schema().version
+        if version != self._schema_version:
+            with self._lock:
+                if self._schema_version is not None:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._entities = None
+                self._schema_version = version
+
+    def _entity_pattern(self):
+        now = time.time()
+        if self._entities is not None and now - self._entities_loaded_at < TEMPLATE_ENTITY_REFRESH_SECONDS:
+            return self._entities or None
+        schema = get_schema()
+        values = set()
+        with get_pool().connection() as conn:
+            for qualified in filter(None, (column.strip() for column in TEMPLATE_ENTITY_COLUMNS.split(","))):
+                table, _, column = qualified.partition(".")
+                if column not in schema.tables.get(table, []):
+                    continue
+                rows = conn.execute(
+                    f'SELECT DISTINCT "{column}" FROM "{table}" WHERE "{column}" IS NOT NULL LIMIT ?',
+                    (TEMPLATE_ENTITY_LIMIT + 1,)
+                ).fetchall()
+                if len(rows) <= TEMPLATE_ENTITY_LIMIT:
+                    values.update(str(row[0]) for row in rows if str(row[0]).strip())
+        # Longest names first so "iPhone 15 Pro" wins over a shorter overlapping value
+        self._entity_values = {value.lower(): value for value in values}
+        alternatives = "|".join(re.escape(value) for value in sorted(values, key=len, reverse=True))
+        self._entities = re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE) if alternatives else False
+        self._entities_loaded_at = now
+        return self._entities or None
+
+    def _parameterize(self, sql: str, slots: list[tuple[str, str]]) -> dict | None:
+        tokens = [(match.start(), match.end(), match.group(0)) for match in _SQL_TOKEN.finditer(sql)]
+        bindings = []
+        used = set()
+        for kind, value in slots:
+            matches = []
+            for index, (_, _, token) in enumerate(tokens):
+                if kind == "number":
+                    if not token.startswith("'") and float(token) == float(value):
+                        matches.append((index, None))
+                elif token.startswith("'"):
+                    inner = token[1:-1].replace("''", "'")
+                    core = inner.strip("%")
+                    if core.lower() == value.lower():
+                        case = "lower" if core == value.lower() != value else "upper" if core == value.upper() != value else "same"
+                        matches.append((index, (inner[:len(inner) - len(inner.lstrip("%"))], case, inner[len(inner.rstrip("%")):])))
+            if len(matches) != 1 or matches[0][0] in used:
+                return None
+            used.add(matches[0][0])
+            bindings.append((matches[0][0], kind, matches[0][1]))
+        parts, last = [], 0
+        slot_of_token = {index: slot for slot, (index, _, _) in enumerate(bindings)}
+        for index, (start, end, _) in enumerate(tokens):
+            if index in slot_of_token:
+                parts.append(sql[last:start])
+                parts.append(_MARKER.format(slot_of_token[index]))
+                last = end
+        parts.append(sql[last:])
+        return {"sql": "".join(parts), "slots": [(kind, shape) for _, kind, shape in bindings]}
+
+    def _bind(self, entry: dict, slots: list[tuple[str, str]]) -> str | None:
+        if len(slots) != len(entry["slots"]):
+            return None
+        literals = []
+        for (kind, value), (stored_kind, shape) in zip(slots, entry["slots"]):
+            if kind != stored_kind:
+                return None
+            if kind == "number":
+                if not _NUMBER.fullmatch(value):
+                    return None
+                literals.append(value)
+            else:
+                prefix, case, suffix = shape
+                value = value.lower() if case == "lower" else value.upper() if case == "upper" else value
+                literals.append(_sql_string(prefix + value + suffix))
+        return _MARKER_PATTERN.sub(lambda match: literals[int(match.group(1))], entry["sql"])
+
+
+template_cache = QueryTemplateCache()
+
+
+def cached_read_query(state) -> bool:
+    # A hit fills in validated_query, so routing goes straight to execution without any LLM call
+    sql = template_cache.lookup(state.get("input"))
+    if sql is None:
+        return False
+    record_cache_hit("template")
+    state["query"] = sql
+    state["validated_query"] = sql
+    intermediate = state.get("intermediate_steps", [])
+    intermediate.append(("template_cache", "hit"))
+    intermediate.append(("query_generation", sql))
+    state["intermediate_steps"] = intermediate
+    return True
+
+
+def remember_read_query(state, sql: str):
+    template_cache.store(state.get("input"), sql)
@@ -0,0 +1,81 @@
+"""Requests/sec of the async graph as the number of in-flight requests grows.
+
+The OpenAI client is replaced by a stand-in that sleeps for --llm-latency seconds per
+call, so the numbers measure how well the request path overlaps waiting, not the model.
+Run from the repo root after `python db/create_tables.py`:
+
+    python -m benchmarks.concurrency --requests 64 --llm-latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import time
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("LLM_CACHE_ENABLED", "0")
+
+from langchain_core.messages import AIMessage
+from langchain_openai import ChatOpenAI
+
+from agents.graph import AgenticCRUDApp
+
+
+def _canned(prompt) -> AIMessage:
+    text = str(prompt)
+    if "classify the intended database operation" in text:
+        return AIMessage(content="read")
+    if "SQL" in text and "Data:" not in text:
+        return AIMessage(content="SELECT COUNT(*) FROM orders")
+    return AIMessage(content="There are some orders.")
+
+
+def _initial_state(user_input: str) -> dict:
+    return {
+        "input": user_input,
+        "intent": None,
+        "query": None,
+        "validated_query": None,
+        "results": None,
+        "columns": None,
+        "next_cursor": None,
+        "answer": None,
+        "formatter": None,
+        "human_verified": None,
+        "verification_required": False,
+        "intermediate_steps": []
+    }
+
+
+async def _run_level(crud_agent: AgenticCRUDApp, requests: int, in_flight: int) -> float:
+    semaphore = asyncio.Semaphore(in_flight)
+
+    async def one(i):
+        async with semaphore:
+            await crud_agent.app.ainvoke(_initial_state(f"how many orders are there? #{i}"))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int, llm_latency: float, levels: list[int]):
+    async def fake_ainvoke(self, prompt, *args, **kwargs):
+        await asyncio.sleep(llm_latency)
+        return _canned(prompt)
+
+    with mock.patch.object(ChatOpenAI, "ainvoke", fake_ainvoke):
+        crud_agent = AgenticCRUDApp()
+        print(f"{'in_flight':>10} {'req/s':>10}")
+        for in_flight in levels:
+            rps = await _run_level(crud_agent, requests, in_flight)
+            print(f"{in_flight:>10} {rps:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.llm_latency, args.levels))
@@ -0,0 +1,95 @@
+"""Deterministic stand-in for the OpenAI chat model used by the benchmarks.
+
+Answers every prompt the graph sends (intent, generation, self-check, validation and
+formatting) from a fixed table of questions, after sleeping for a configurable latency.
+It is a real chat model, so callbacks, streaming and token metadata behave as in
+production. install() routes every role in the core/llm.py registry to it; setting
+LLM_PROVIDER=fake does the same for a server process.
+"""
+import asyncio
+import json
+import os
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# question -> (intent, SQL, answer used when the result goes to the LLM formatter)
+SCENARIOS = {
+    "how many orders are there": ("read", "SELECT COUNT(*) FROM orders", "There are some orders."),
+    "how many active users do we have": ("read", "SELECT COUNT(*) FROM users WHERE is_active = 1", "Some users are active."),
+    "total revenue per product category": (
+        "read",
+        "SELECT p.category, SUM(o.quantity * p.price) AS revenue FROM orders o JOIN products p ON o.product_id = p.id GROUP BY p.category",
+        "Revenue is spread across categories.",
+    ),
+    "show the 20 most recent delivered orders": (
+        "read",
+        "SELECT id, user_id, product_id, quantity, order_date FROM orders WHERE order_status = 'Delivered' ORDER BY order_date DESC LIMIT 20",
+        "Here are the latest delivered orders.",
+    ),
+    "list the top customers by quantity ordered": (
+        "read",
+        "SELECT u.name, u.email, SUM(o.quantity) AS items FROM users u JOIN orders o ON o.user_id = u.id GROUP BY u.id ORDER BY items DESC LIMIT 50",
+        "These customers ordered the most items.",
+    ),
+}
+QUESTIONS = list(SCENARIOS)
+
+
+class FakeChatModel(BaseChatModel):
+    latency: float = 0.0
+    model_name: str = "fake-benchmark-model"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model_name": self.model_name}
+
+    def _scenario(self, text: str):
+        for question, scenario in SCENARIOS.items():
+            if question in text.lower():
+                return scenario
+        return SCENARIOS[QUESTIONS[0]]
+
+    def _reply(self, messages) -> ChatResult:
+        text = "\n".join(str(message.content) for message in messages)
+        intent, sql, answer = self._scenario(text)
+        if "classify the intended database operation" in text:
+            content = intent
+        elif '"verdict"' in text:
+            content = json.dumps({"sql": sql, "verdict": "valid"})
+        elif "SQL" in text and "Data:" not in text:
+            content = sql
+        else:
+            content = answer
+        prompt_tokens = len(text) // 4
+        completion_tokens = max(1, len(content) // 4)
+        message = AIMessage(
+            content=content,
+            usage_metadata={"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+
+def install(latency: float = 0.0):
+    # Routes every role to this model; the response cache wrapper and instrumentation stay in place
+    from core.llm import reset_models
+
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(latency)
+    reset_models()
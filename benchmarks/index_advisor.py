@@ -0,0 +1,81 @@
+"""Index advisor report on a synthetic data set.
+
+Builds a seeded copy of data/apps.db (see benchmarks/suite.py), replays SELECTs shaped like
+the ones the read pipeline generates, feeds them to db/index_advisor.py and prints every
+proposed index with its estimated and measured speedup. Run from the repo root after
+`python db/create_tables.py`:
+
+    python -m benchmarks.index_advisor --orders 200000 --output benchmarks/index_advisor.json
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.suite import STATUSES, build_dataset
+
+WORKLOAD = [
+    "SELECT id, product_id, quantity, order_status FROM orders WHERE user_id = {user}",
+    "SELECT COUNT(*) FROM orders WHERE user_id = {user} AND order_status = '{status}'",
+    "SELECT o.id, p.name, o.quantity FROM orders o JOIN products p ON p.id = o.product_id WHERE o.user_id = {user} ORDER BY o.order_date DESC",
+    "SELECT SUM(quantity) FROM orders WHERE product_id = {product}",
+    "SELECT id, user_id FROM orders WHERE order_date >= '{since}' ORDER BY order_date",
+    "SELECT u.name, COUNT(o.id) FROM users u JOIN orders o ON o.user_id = u.id WHERE u.id = {user} GROUP BY u.name",
+    "SELECT COUNT(*) FROM orders",
+]
+
+
+def workload(count: int, dataset: dict, seed: int = 11) -> list[str]:
+    rng = random.Random(seed)
+    queries = []
+    for i in range(count):
+        template = WORKLOAD[i % len(WORKLOAD)]
+        queries.append(template.format(
+            user=rng.randint(1, dataset["users"]),
+            product=rng.randint(1, dataset["products"]),
+            status=rng.choice(STATUSES),
+            since=f"2025-{rng.randint(1, 12):02d}-01",
+        ))
+    return queries
+
+
+def main(args):
+    from db.index_advisor import IndexAdvisor
+
+    with tempfile.TemporaryDirectory(prefix="index-advisor-bench-") as workdir:
+        db_path = os.path.join(workdir, "apps.db")
+        dataset = build_dataset(db_path, args.orders)
+        advisor = IndexAdvisor(db_path)
+        conn = sqlite3.connect(db_path)
+        for sql in workload(args.queries, dataset):
+            started = time.perf_counter()
+            conn.execute(sql).fetchall()
+            advisor.observe(sql, (time.perf_counter() - started) * 1000)
+        conn.close()
+        report = advisor.report(measure=True, repeat=args.repeat)
+    report["dataset"] = dataset
+
+    print(f"orders={dataset['orders']}  observed={report['observed_queries']}  unindexable scans={report['unindexable_scans']}")
+    print(f"{'index':>60} {'queries':>8} {'estimated':>10} {'measured':>9} {'build_ms':>9}")
+    for proposal in report["proposals"]:
+        name = f"{proposal['table']}({', '.join(proposal['columns'])})"
+        measured = proposal["measured"]
+        estimated = proposal["estimated_speedup"]
+        speedup = f"{measured['speedup']}x" if "speedup" in measured else "budget"
+        print(f"{name:>60} {proposal['queries']:>8} {str(estimated) + 'x' if estimated else '-':>10} {speedup:>9} {measured.get('build_ms', '-'):>9}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100000, help="orders rows in the data set")
+    parser.add_argument("--queries", type=int, default=700, help="queries replayed through the advisor")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per example query")
+    parser.add_argument("--output", help="write the JSON report here")
+    main(parser.parse_args())
@@ -0,0 +1,103 @@
+"""Accuracy and latency of the rule-based intent fast path versus the LLM classifier.
+
+Without --llm only the rules are measured: coverage (share answered without an LLM
+call), accuracy on the covered share and per-call latency. With --llm the same labelled
+set is also sent through the prompt used by reason_and_act_node (needs OPENAI_API_KEY):
+
+    python -m benchmarks.intent_classifier
+    python -m benchmarks.intent_classifier --llm
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("LLM_CACHE_ENABLED", "0")
+
+from core.intent import classify_intent
+
+LABELLED = [
+    ("Show me all users", "read"),
+    ("List all products in the Electronics category", "read"),
+    ("How many orders were delivered last month?", "read"),
+    ("Get the email of user with ID 5", "read"),
+    ("What is the total revenue from Books?", "read"),
+    ("Which users have never placed an order?", "read"),
+    ("Find users whose name starts with S", "read"),
+    ("Count the active users", "read"),
+    ("Who bought the MacBook Pro?", "read"),
+    ("Display the 5 most expensive products", "read"),
+    ("Jessica's orders", "read"),
+    ("orders from the last week", "read"),
+    ("Add a new user named John with email john@example.com", "create"),
+    ("Insert a product called Laptop with price 999", "create"),
+    ("Create an order for user 3 buying 2 units of product 7", "create"),
+    ("Register Anna Smith, anna@smith.io, as an active user", "create"),
+    ("Place an order for Sarah for one iPhone 15 Pro", "create"),
+    ("new product: Desk Lamp, Office Supplies, 29.99, 40 in stock", "create"),
+    ("Update user John's email to newemail@example.com", "update"),
+    ("Change the price of product with ID 3 to 799", "update"),
+    ("Set the stock of AirPods Pro to 60", "update"),
+    ("Mark order 12 as Shipped", "update"),
+    ("Deactivate the user with email m.chen@outlook.com", "update"),
+    ("Increase the price of all Books by 10%", "update"),
+    ("Robert Kim is active again", "update"),
+    ("Delete user with ID 5", "delete"),
+    ("Remove the product named Laptop", "delete"),
+    ("Delete all cancelled orders", "delete"),
+    ("Get rid of the Yoga Mat Premium product", "delete"),
+    ("Erase orders older than a year", "delete"),
+    ("show me how to delete a user", "read"),
+    ("the Dyson vacuum should not be in the catalogue anymore", "delete"),
+    ("Add 10 units to the stock of the iPhone 15 Pro", "update"),
+    ("Add 5 to the price of product 3", "update"),
+    ("Remove the Books category from product 13", "update"),
+    ("Update me on the status of order 5", "read"),
+    ("Create a report of orders by month", "read"),
+]
+
+
+def _bench_rules():
+    latencies, covered, correct = [], 0, 0
+    for text, expected in LABELLED:
+        start = time.perf_counter()
+        result = classify_intent(text)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        if result is not None:
+            covered += 1
+            correct += result[0] == expected
+    print(f"rules: coverage {covered}/{len(LABELLED)} ({covered / len(LABELLED):.0%}), "
+          f"accuracy on covered {correct}/{covered} ({correct / max(covered, 1):.0%}), "
+          f"p50 {statistics.median(latencies):.1f}us")
+
+
+def _bench_llm():
+    from core.llm import get_llm
+    from core.prompts import intent_classification_prompt
+
+    latencies, correct, hybrid_correct, llm_calls = [], 0, 0, 0
+    for text, expected in LABELLED:
+        start = time.perf_counter()
+        response = get_llm("intent").invoke(intent_classification_prompt.format(input=text), cache=False)
+        latencies.append((time.perf_counter() - start) * 1e3)
+        predicted = response.content.strip().lower()
+        correct += predicted == expected
+        fast = classify_intent(text)
+        if fast is None:
+            llm_calls += 1
+            hybrid_correct += predicted == expected
+        else:
+            hybrid_correct += fast[0] == expected
+    print(f"llm:   accuracy {correct}/{len(LABELLED)} ({correct / len(LABELLED):.0%}), "
+          f"p50 {statistics.median(latencies):.0f}ms")
+    print(f"rules+llm fallback: accuracy {hybrid_correct}/{len(LABELLED)} ({hybrid_correct / len(LABELLED):.0%}), "
+          f"{llm_calls} LLM calls instead of {len(LABELLED)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm", action="store_true", help="also run the LLM classifier (needs OPENAI_API_KEY)")
+    args = parser.parse_args()
+    _bench_rules()
+    if args.llm:
+        _bench_llm()
@@ -0,0 +1,167 @@
+"""Reader throughput under concurrent writes: WAL with read-only readers versus a rollback journal.
+
+Builds a seeded data set (see benchmarks/suite.py) and runs --readers threads of SELECTs for
+--duration seconds, first without and then with --writers threads committing INSERT/UPDATEs.
+
+- wal:      readers use the read-only pool from db/connection.py (mode=ro, query_only) and
+            writers go through the single writer in db/write_queue.py, as in the app
+- rollback: every thread has its own read-write connection on a journal_mode=DELETE copy,
+            so a commit needs an exclusive lock that waits for, and blocks, readers
+
+Run from the repo root after `python db/create_tables.py`:
+
+    python -m benchmarks.mixed_load --orders 200000 --readers 4 --writers 2 --duration 5
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from benchmarks.suite import STATUSES, _percentiles, build_dataset
+
+READS = [
+    "SELECT COUNT(*) FROM orders WHERE user_id = {user}",
+    "SELECT order_status, COUNT(*) FROM orders GROUP BY order_status",
+    "SELECT id, quantity, order_date FROM orders WHERE id = {order}",
+    "SELECT name, email FROM users WHERE id = {user}",
+]
+WRITES = [
+    "INSERT INTO orders (user_id, product_id, quantity, order_status, order_date) VALUES ({user}, {product}, 1, '{status}', '2025-06-01T12:00:00')",
+    "UPDATE products SET stock = stock + 1 WHERE id = {product}",
+]
+
+
+def _statement(templates: list[str], rng: random.Random, dataset: dict) -> str:
+    return rng.choice(templates).format(
+        user=rng.randint(1, dataset["users"]),
+        product=rng.randint(1, dataset["products"]),
+        order=rng.randint(1, dataset["orders"]),
+        status=rng.choice(STATUSES),
+    )
+
+
+def _run(read, write, readers: int, writers: int, duration: float, dataset: dict) -> dict:
+    stop = threading.Event()
+    latencies, errors, commits = [], {"read": 0, "write": 0}, [0]
+    lock = threading.Lock()
+
+    def reader(seed):
+        rng, samples, failed = random.Random(seed), [], 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                read(_statement(READS, rng, dataset))
+                samples.append((time.perf_counter() - started) * 1000)
+            except sqlite3.OperationalError:
+                failed += 1
+        with lock:
+            latencies.extend(samples)
+            errors["read"] += failed
+
+    def writer(seed):
+        rng, done, failed = random.Random(seed), 0, 0
+        while not stop.is_set():
+            try:
+                write(_statement(WRITES, rng, dataset))
+                done += 1
+            except sqlite3.OperationalError:
+                failed += 1
+        with lock:
+            commits[0] += done
+            errors["write"] += failed
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {
+        "writers": writers,
+        "reads_per_s": round(len(latencies) / duration, 1),
+        "read_ms": _percentiles(latencies),
+        "writes_per_s": round(commits[0] / duration, 1),
+        "errors": errors,
+    }
+
+
+def wal_engine(path: str, readers: int):
+    from db.connection import ConnectionPool
+    from db.write_queue import WriteQueue
+
+    pool = ConnectionPool(path, size=readers, readonly=True)
+    queue = WriteQueue(path)
+
+    def read(sql):
+        with pool.connection() as conn:
+            conn.execute(sql).fetchall()
+
+    return read, queue.execute
+
+
+def rollback_engine(path: str):
+    from db.connection import DB_CACHE_SIZE_KB, DB_MMAP_SIZE
+
+    local = threading.local()
+    setup = sqlite3.connect(path)
+    setup.execute("PRAGMA journal_mode=DELETE")
+    setup.close()
+
+    def connection():
+        if not hasattr(local, "conn"):
+            # Same cache and mmap tuning as db/connection.py, so only the locking model differs
+            local.conn = sqlite3.connect(path, timeout=5.0)
+            local.conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+            local.conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+        return local.conn
+
+    def read(sql):
+        connection().execute(sql).fetchall()
+
+    def write(sql):
+        conn = connection()
+        conn.execute(sql)
+        conn.commit()
+
+    return read, write
+
+
+def main(args):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="mixed-load-") as workdir:
+        source = os.path.join(workdir, "source.db")
+        dataset = build_dataset(source, args.orders)
+        for mode in ("wal", "rollback"):
+            path = os.path.join(workdir, f"{mode}.db")
+            shutil.copy(source, path)
+            read, write = wal_engine(path, args.readers) if mode == "wal" else rollback_engine(path)
+            results[mode] = [_run(read, write, args.readers, writers, args.duration, dataset) for writers in (0, args.writers)]
+
+    print(f"orders={dataset['orders']}  readers={args.readers}  duration={args.duration}s")
+    print(f"{'mode':>9} {'writers':>8} {'reads/s':>9} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'writes/s':>9} {'errors':>7}")
+    for mode, runs in results.items():
+        for run in runs:
+            latency = run["read_ms"]
+            print(f"{mode:>9} {run['writers']:>8} {run['reads_per_s']:>9} {latency.get('p50', '-'):>8} {latency.get('p95', '-'):>8} "
+                  f"{latency.get('p99', '-'):>8} {run['writes_per_s']:>9} {sum(run['errors'].values()):>7}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"dataset": dataset, "readers": args.readers, "duration": args.duration, "results": results}, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=200000, help="orders rows in the data set")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent reader threads")
+    parser.add_argument("--writers", type=int, default=2, help="concurrent writer threads in the loaded run")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per run")
+    parser.add_argument("--output", help="write the JSON report here")
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""SQLite versus the DuckDB snapshot in db/columnar.py on aggregation queries.
+
+Builds a seeded data set per size (see benchmarks/suite.py), takes a columnar snapshot of
+it and times each query on both engines. Rows are compared after sorting and rounding, so
+a routing mistake shows up as a mismatch rather than a speedup. Needs `pip install duckdb`.
+Run from the repo root after `python db/create_tables.py`:
+
+    python -m benchmarks.read_engine --sizes 100000 1000000 --output benchmarks/read_engine.json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.suite import build_dataset
+
+QUERIES = {
+    "revenue by category": "SELECT p.category, ROUND(SUM(o.quantity * p.price), 2) AS revenue FROM orders o JOIN products p ON o.product_id = p.id GROUP BY p.category ORDER BY revenue DESC",
+    "orders per month": "SELECT substr(order_date, 1, 7) AS month, COUNT(*) AS orders FROM orders GROUP BY month ORDER BY month",
+    "orders per status": "SELECT order_status, COUNT(*) AS orders, SUM(quantity) AS units FROM orders GROUP BY order_status",
+    "top customers": "SELECT u.name, COUNT(o.id) AS orders, ROUND(SUM(o.quantity * p.price), 2) AS spent FROM orders o JOIN users u ON o.user_id = u.id JOIN products p ON o.product_id = p.id GROUP BY u.id, u.name ORDER BY spent DESC LIMIT 10",
+    "average basket": "SELECT p.category, AVG(o.quantity) AS avg_quantity, MAX(p.price) AS max_price FROM orders o JOIN products p ON o.product_id = p.id WHERE o.order_status = 'Delivered' GROUP BY p.category",
+}
+
+
+def _timed(run, repeat: int):
+    samples, rows = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), rows
+
+
+def _comparable(rows) -> list:
+    return sorted(tuple(round(value, 2) if isinstance(value, float) else value for value in row) for row in rows)
+
+
+def measure(orders: int, repeat: int) -> dict:
+    from db.columnar import ColumnarEngine
+
+    with tempfile.TemporaryDirectory(prefix="read-engine-") as workdir:
+        db_path = os.path.join(workdir, "apps.db")
+        dataset = build_dataset(db_path, orders)
+        engine = ColumnarEngine(db_path)
+        engine.refresh()
+        conn = sqlite3.connect(db_path)
+        queries = {}
+        for name, sql in QUERIES.items():
+            sqlite_ms, sqlite_rows = _timed(lambda: conn.execute(sql).fetchall(), repeat)
+            duckdb_ms, (_, duckdb_rows, _) = _timed(lambda: engine.execute(sql, 10_000), repeat)
+            queries[name] = {
+                "sqlite_ms": round(sqlite_ms, 3),
+                "duckdb_ms": round(duckdb_ms, 3),
+                "speedup": round(sqlite_ms / duckdb_ms, 1) if duckdb_ms else None,
+                "same_rows": _comparable(sqlite_rows) == _comparable(duckdb_rows),
+            }
+        conn.close()
+    return {"dataset": dataset, "snapshot_seconds": engine.last_refresh_seconds, "queries": queries}
+
+
+def main(args):
+    results = []
+    for orders in args.sizes:
+        entry = measure(orders, args.repeat)
+        results.append(entry)
+        print(f"\norders={orders}  snapshot={entry['snapshot_seconds']}s")
+        print(f"{'query':>22} {'sqlite_ms':>10} {'duckdb_ms':>10} {'speedup':>8} {'same':>5}")
+        for name, query in entry["queries"].items():
+            print(f"{name:>22} {query['sqlite_ms']:>10} {query['duckdb_ms']:>10} {str(query['speedup']) + 'x':>8} {str(query['same_rows']):>5}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"sqlite": sqlite3.sqlite_version, "results": results}, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000], help="orders rows per data set")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per query and engine")
+    parser.add_argument("--output", help="write the JSON report here")
+    main(parser.parse_args())
@@ -0,0 +1,63 @@
+"""Per-request sqlite3.connect versus the pooled, tuned connections in db/connection.py.
+
+Runs the same SELECTs the read path typically sees, once opening a fresh connection per
+query (the old execute-node behaviour) and once through get_pool(). Run from the repo
+root after `python db/create_tables.py`:
+
+    python -m benchmarks.sqlite_pool --iterations 2000
+"""
+import argparse
+import sqlite3
+import statistics
+import time
+
+from db.connection import DB_PATH, get_pool
+
+QUERIES = [
+    "SELECT COUNT(*) FROM users",
+    "SELECT name, email FROM users WHERE is_active = 1",
+    "SELECT p.category, SUM(o.quantity * p.price) FROM orders o JOIN products p ON o.product_id = p.id GROUP BY p.category",
+    "SELECT * FROM orders WHERE order_status = 'Delivered' ORDER BY order_date DESC LIMIT 10",
+]
+
+
+def per_request(query: str):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute(query)
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+
+def pooled(query: str):
+    with get_pool().connection() as conn:
+        c = conn.cursor()
+        c.execute(query)
+        return c.fetchall()
+
+
+def _measure(fn, iterations: int) -> list[float]:
+    samples = []
+    for i in range(iterations):
+        query = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main(iterations: int):
+    pooled(QUERIES[0])  # open the first pooled connection outside the timed loop
+    print(f"{'mode':>12} {'mean_us':>10} {'p50_us':>10} {'p99_us':>10}")
+    for name, fn in [("per_request", per_request), ("pooled", pooled)]:
+        samples = sorted(_measure(fn, iterations))
+        p99 = samples[int(len(samples) * 0.99) - 1]
+        print(f"{name:>12} {statistics.mean(samples):>10.1f} {statistics.median(samples):>10.1f} {p99:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.iterations)
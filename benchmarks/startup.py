@@ -0,0 +1,110 @@
+"""Cold start of the API: import-time profile and time until the app is ready to serve.
+
+- imports: `python -X importtime -c "import main"` in a fresh interpreter, summed per
+           top-level package, with the slowest packages listed
+- ready:   uvicorn started in a subprocess and polled on GET /ready, with and without
+           STARTUP_PREWARM; the imports/lifespan split comes from agent_startup_seconds
+
+Every run is a new process, so nothing is shared between them. The LLM clients are
+built but never called, so no network access or real API key is needed. Run from the
+repo root after `python db/create_tables.py`:
+
+    python -m benchmarks.startup --runs 3 --output benchmarks/startup.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+_STARTUP_METRIC = re.compile(r'agent_startup_seconds\{phase="(\w+)"\} (\S+)')
+
+
+def _env(prewarm: bool) -> dict:
+    env = dict(os.environ, STARTUP_PREWARM="1" if prewarm else "0", PYTHONWARNINGS="ignore")
+    env.setdefault("OPENAI_API_KEY", "sk-startup-benchmark")
+    return env
+
+
+def import_profile(top: int) -> dict:
+    run = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         env=_env(False), capture_output=True, text=True, check=True)
+    packages, total = defaultdict(int), 0
+    for line in run.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = int(match[1]), int(match[2]), match[3], match[4]
+        packages[module.split(".")[0]] += self_us
+        if indent == " ":
+            total += cumulative_us
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {"total_ms": round(total / 1000, 1), "packages_ms": {name: round(us / 1000, 1) for name, us in slowest}}
+
+
+def _get(url: str) -> str:
+    with urllib.request.urlopen(url, timeout=1) as response:
+        return response.read().decode()
+
+
+def time_to_ready(prewarm: bool, port: int, timeout: float) -> dict:
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=_env(prewarm), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {server.returncode}")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"not ready after {timeout}s")
+            try:
+                _get(f"http://127.0.0.1:{port}/ready")
+                break
+            except OSError:
+                time.sleep(0.02)
+        ready = time.perf_counter() - started
+        phases = {phase: float(value) for phase, value in _STARTUP_METRIC.findall(_get(f"http://127.0.0.1:{port}/metrics"))}
+    finally:
+        server.terminate()
+        server.wait()
+    return {"ready_s": ready, **{f"{phase}_s": seconds for phase, seconds in phases.items()}}
+
+
+def main(args):
+    profile = import_profile(args.top)
+    print(f"import main: {profile['total_ms']} ms")
+    print(f"{'package':>24} {'self_ms':>9}")
+    for name, ms in profile["packages_ms"].items():
+        print(f"{name:>24} {ms:>9}")
+
+    ready = {}
+    for prewarm in (False, True):
+        runs = [time_to_ready(prewarm, args.port, args.timeout) for _ in range(args.runs)]
+        ready["prewarm" if prewarm else "lazy"] = {
+            key: round(statistics.median(run[key] for run in runs), 3) for key in runs[0]
+        }
+    print(f"\n{'startup':>9} {'ready_s':>8} {'imports_s':>10} {'lifespan_s':>11}")
+    for mode, entry in ready.items():
+        print(f"{mode:>9} {entry['ready_s']:>8} {entry.get('imports_s', '-'):>10} {entry.get('lifespan_s', '-'):>11}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": sys.version.split()[0], "imports": profile, "ready": ready}, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="server starts per mode; the median is reported")
+    parser.add_argument("--top", type=int, default=15, help="packages listed in the import profile")
+    parser.add_argument("--port", type=int, default=8765, help="port for the uvicorn subprocess")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for /ready")
+    parser.add_argument("--output", help="write the JSON report here")
+    main(parser.parse_args())
@@ -0,0 +1,284 @@
+"""End-to-end benchmark suite on the deterministic fake LLM in benchmarks/fake_llm.py.
+
+For every data size a worker process gets its own scaled copy of data/apps.db (DB_PATH)
+and measures:
+
+- graph:  synchronous graph runs with a zero-latency model; overhead is request wall
+          time not spent inside any node
+- nodes:  per-node wall and SQLite time, from the instrumentation in core/metrics.py
+- sqlite: the scenario SQL executed directly through the connection pool
+- http:   POST /query through the ASGI app at each concurrency level, with the model
+          sleeping --llm-latency seconds per call
+
+Response, template and result caches are off unless --caches is given, so every request
+takes the full path. Results are written as JSON; pass --baseline with an earlier file
+to print the change in the headline numbers. Run from the repo root after
+`python db/create_tables.py`:
+
+    python -m benchmarks.suite --sizes 1000 100000 --output benchmarks/results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from db.connection import DB_PATH
+
+STATUSES = ["Delivered", "Shipped", "Processing", "Pending", "Cancelled"]
+CATEGORIES = ["Electronics", "Books", "Clothing", "Home & Kitchen", "Sports & Outdoors", "Office Supplies"]
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {"mean": round(sum(ordered) / len(ordered), 3), "p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "n": len(ordered)}
+
+
+def build_dataset(path: str, orders: int, seed: int = 7) -> dict:
+    # Same DDL as the source database, filled with seeded synthetic rows
+    source = sqlite3.connect(DB_PATH)
+    ddl = [row[0] for row in source.execute(
+        "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY CASE type WHEN 'table' THEN 0 ELSE 1 END"
+    )]
+    source.close()
+    rng = random.Random(seed)
+    users = max(12, orders // 10)
+    products = max(20, orders // 50)
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    conn = sqlite3.connect(path)
+    for statement in ddl:
+        conn.execute(statement)
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (name, email, is_active, created_at) VALUES (?, ?, ?, ?)",
+            ((f"User {i}", f"user{i}@example.com", int(rng.random() < 0.8), (start + timedelta(minutes=i)).isoformat()) for i in range(users)),
+        )
+        conn.executemany(
+            "INSERT INTO products (name, category, price, stock) VALUES (?, ?, ?, ?)",
+            ((f"Product {i}", rng.choice(CATEGORIES), round(rng.uniform(2, 500), 2), rng.randint(0, 200)) for i in range(products)),
+        )
+        conn.executemany(
+            "INSERT INTO orders (user_id, product_id, quantity, order_status, order_date) VALUES (?, ?, ?, ?, ?)",
+            ((rng.randint(1, users), rng.randint(1, products), rng.randint(1, 5), rng.choice(STATUSES),
+              (start + timedelta(seconds=rng.randint(0, 365 * 86400))).isoformat()) for _ in range(orders)),
+        )
+    conn.close()
+    return {"orders": orders, "users": users, "products": products}
+
+
+def _initial_state(user_input: str) -> dict:
+    return {
+        "input": user_input,
+        "intent": None,
+        "query": None,
+        "validated_query": None,
+        "results": None,
+        "columns": None,
+        "next_cursor": None,
+        "answer": None,
+        "formatter": None,
+        "human_verified": None,
+        "verification_required": False,
+        "intermediate_steps": []
+    }
+
+
+def measure_graph(iterations: int) -> tuple[dict, dict]:
+    from agents.graph import AgenticCRUDApp
+    from benchmarks.fake_llm import QUESTIONS, install
+    from core.metrics import track_request
+
+    install(latency=0.0)
+    crud_agent = AgenticCRUDApp()
+    crud_agent.app.invoke(_initial_state(QUESTIONS[0]))  # warm the schema snapshot and pool
+    walls, overheads, nodes = [], [], {}
+    for i in range(iterations):
+        with track_request() as timings:
+            start = time.perf_counter()
+            crud_agent.app.invoke(_initial_state(QUESTIONS[i % len(QUESTIONS)]))
+            wall = (time.perf_counter() - start) * 1000
+        walls.append(wall)
+        overheads.append(wall - sum(record["wall_ms"] for record in timings))
+        for record in timings:
+            node = nodes.setdefault(record["node"], {"wall_ms": [], "llm_ms": [], "sqlite_ms": []})
+            for key in node:
+                node[key].append(record[key])
+    graph = {"request_ms": _percentiles(walls), "overhead_ms": _percentiles(overheads)}
+    return graph, {name: {key: _percentiles(values) for key, values in node.items()} for name, node in nodes.items()}
+
+
+def measure_sqlite(iterations: int) -> dict:
+    from benchmarks.fake_llm import SCENARIOS
+    from db.connection import get_pool
+
+    results = {}
+    for question, (_, sql, _) in SCENARIOS.items():
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            with get_pool().connection() as conn:
+                conn.execute(sql).fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        results[question] = {"sql": sql, "ms": _percentiles(samples)}
+    return results
+
+
+async def measure_http(requests: int, levels: list[int], llm_latency: float) -> list[dict]:
+    import httpx
+    import main
+    from benchmarks.fake_llm import QUESTIONS, install
+
+    install(latency=llm_latency)
+    results = []
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            await client.post("/query", json={"input": QUESTIONS[0]})
+            for in_flight in levels:
+                semaphore = asyncio.Semaphore(in_flight)
+                latencies, errors = [], 0
+
+                async def one(i):
+                    nonlocal errors
+                    async with semaphore:
+                        start = time.perf_counter()
+                        response = await client.post("/query", json={"input": QUESTIONS[i % len(QUESTIONS)]})
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        errors += response.status_code != 200 or response.json().get("status") != "completed"
+
+                start = time.perf_counter()
+                await asyncio.gather(*(one(i) for i in range(requests)))
+                elapsed = time.perf_counter() - start
+                results.append({
+                    "in_flight": in_flight,
+                    "requests": requests,
+                    "errors": errors,
+                    "req_per_s": round(requests / elapsed, 2),
+                    "latency_ms": _percentiles(latencies),
+                })
+    return results
+
+
+def run_worker(args) -> dict:
+    graph, nodes = measure_graph(args.iterations)
+    return {
+        "graph": graph,
+        "nodes": nodes,
+        "sqlite": measure_sqlite(args.iterations),
+        "http": asyncio.run(measure_http(args.requests, args.levels, args.llm_latency)),
+    }
+
+
+def _worker_env(workdir: str, db_path: str, caches: bool) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DB_PATH": db_path,
+        "CHECKPOINT_DB_PATH": os.path.join(workdir, "checkpoints.db"),
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.db"),
+    })
+    if not caches:
+        env.update({"LLM_CACHE_ENABLED": "0", "TEMPLATE_CACHE": "0", "RESULT_CACHE": "0"})
+    return env
+
+
+def _headline(result: dict) -> dict:
+    numbers = {
+        "graph.overhead_ms.p50": result["graph"]["overhead_ms"]["p50"],
+        "graph.request_ms.p50": result["graph"]["request_ms"]["p50"],
+    }
+    for level in result["http"]:
+        numbers[f"http.{level['in_flight']}.req_per_s"] = level["req_per_s"]
+        numbers[f"http.{level['in_flight']}.p95_ms"] = level["latency_ms"]["p95"]
+    return numbers
+
+
+def compare(results: list[dict], baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = {entry["dataset"]["orders"]: entry for entry in json.load(f)["results"]}
+    print(f"\n{'metric':>40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for entry in results:
+        previous = baseline.get(entry["dataset"]["orders"])
+        if previous is None:
+            continue
+        old = _headline(previous)
+        for name, value in _headline(entry).items():
+            if name in old and old[name]:
+                print(f"{str(entry['dataset']['orders']) + ' ' + name:>40} {old[name]:>12} {value:>12} {(value - old[name]) / old[name]:>+8.1%}")
+
+
+def main(args):
+    results = []
+    for orders in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="benchmark-") as workdir:
+            db_path = os.path.join(workdir, "apps.db")
+            started = time.perf_counter()
+            dataset = build_dataset(db_path, orders)
+            dataset["build_s"] = round(time.perf_counter() - started, 3)
+            command = [
+                sys.executable, "-m", "benchmarks.suite", "--worker",
+                "--iterations", str(args.iterations), "--requests", str(args.requests),
+                "--llm-latency", str(args.llm_latency), "--levels", *map(str, args.levels),
+            ]
+            # One process per size so module-level settings (DB_PATH, pools, caches) start fresh
+            worker = subprocess.run(command, env=_worker_env(workdir, db_path, args.caches), capture_output=True, text=True)
+            if worker.returncode != 0:
+                sys.exit(worker.stderr)
+            entry = {"dataset": dataset, **json.loads(worker.stdout.strip().splitlines()[-1])}
+        results.append(entry)
+        print(f"\norders={orders}  graph p50={entry['graph']['request_ms']['p50']} ms  overhead p50={entry['graph']['overhead_ms']['p50']} ms")
+        print(f"{'in_flight':>10} {'req/s':>10} {'p50_ms':>10} {'p95_ms':>10} {'p99_ms':>10} {'errors':>7}")
+        for level in entry["http"]:
+            latency = level["latency_ms"]
+            print(f"{level['in_flight']:>10} {level['req_per_s']:>10} {latency['p50']:>10} {latency['p95']:>10} {latency['p99']:>10} {level['errors']:>7}")
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+            "llm_latency": args.llm_latency,
+            "iterations": args.iterations,
+            "requests": args.requests,
+            "caches": args.caches,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000], help="orders rows per data set")
+    parser.add_argument("--iterations", type=int, default=200, help="graph runs and SQL executions per measurement")
+    parser.add_argument("--requests", type=int, default=200, help="HTTP requests per concurrency level")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--caches", action="store_true", help="leave the LLM, template and result caches on")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(run_worker(args)))
+    else:
+        main(args)
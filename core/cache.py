@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from db.executor import run_in_db_executor
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.db")
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+LLM_CACHE_DISK_ENTRIES = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "50000"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+def cache_key(model: str, prompt: str, params: dict) -> str:
+    payload = json.dumps({"model": model, "prompt": prompt, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    # Two tiers: a bounded in-process LRU in front of an SQLite table that survives restarts
+    def __init__(
+        self,
+        path: str | None = LLM_CACHE_PATH,
+        memory_entries: int = LLM_CACHE_MEMORY_ENTRIES,
+        disk_entries: int = LLM_CACHE_DISK_ENTRIES,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+    ):
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        # The memory tier is used from the event loop, so it never waits behind a disk write
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._accessed = {}
+        self._puts_since_prune = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)")
+            self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        response = self._memory_get(key, now)
+        if response is None and self._conn is not None:
+            response = self._disk_get(key, now)
+        return self._counted(response)
+
+    async def aget(self, key: str) -> str | None:
+        # Same lookup; the SQLite tier runs on the DB executor so the event loop never waits on the file
+        now = time.time()
+        response = self._memory_get(key, now)
+        if response is None and self._conn is not None:
+            response = await run_in_db_executor(self._disk_get, key, now)
+        return self._counted(response)
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+        if self._conn is not None:
+            self._disk_put(key, response, now)
+
+    async def aput(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+        if self._conn is not None:
+            await run_in_db_executor(self._disk_put, key, response, now)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._conn is not None:
+            with self._disk_lock:
+                self._accessed.clear()
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def _memory_get(self, key: str, now: float) -> str | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            response, created_at = entry
+            if now - created_at <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                return response
+            del self._memory[key]
+            return None
+
+    def _disk_get(self, key: str, now: float) -> str | None:
+        # Read-only: the access time is written with the next put, and expired rows are left to _prune_disk
+        with self._disk_lock:
+            row = self._conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                return None
+            self._accessed[key] = now
+        with self._lock:
+            self._remember(key, row[0], row[1])
+            self.disk_hits += 1
+        return row[0]
+
+    def _disk_put(self, key: str, response: str, now: float):
+        with self._disk_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            # Disk hits since the last put share its commit instead of committing one by one
+            if self._accessed:
+                self._conn.executemany(
+                    "UPDATE llm_cache SET last_access = ? WHERE key = ?", [(at, hit) for hit, at in self._accessed.items()]
+                )
+                self._accessed.clear()
+            self._conn.commit()
+            self._puts_since_prune += 1
+            if self._puts_since_prune >= 100:
+                self._prune_disk(now)
+
+    def _counted(self, response: str | None) -> str | None:
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def _remember(self, key: str, response: str, created_at: float):
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _prune_disk(self, now: float):
+        # Expired rows first, then least recently used rows beyond the size limit
+        self._puts_since_prune = 0
+        expired = self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        overflow = self._conn.execute(
+            "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.disk_entries,),
+        ).rowcount
+        self._conn.commit()
+        self.evictions += expired + overflow
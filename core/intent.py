@@ -0,0 +1,51 @@
+import os
+import re
+
+INTENT_FAST_PATH_ENABLED = os.getenv("INTENT_FAST_PATH", "1") == "1"
+INTENT_FAST_PATH_THRESHOLD = float(os.getenv("INTENT_FAST_PATH_THRESHOLD", "0.8"))
+
+# (intent, pattern, weight). Leading verbs are strong evidence; keywords elsewhere in the sentence are weak
+# evidence that mostly serves to lower confidence on mixed requests such as "show me what I can delete".
+INTENT_RULES = [
+    ("read", r"^(please\s+)?(show|list|get|find|display|fetch|give me|tell me|what|which|who|whose|when|where|how many|how much|count|select|view|search|look up|lookup|is there|are there|do we have|does)\b", 3.0),
+    ("read", r"\b(how many|total|average|sum of|number of|top \d+|most|least|highest|lowest|all (the )?(users|products|orders))\b", 1.0),
+    ("create", r"^(please\s+)?(add|create|insert|register|sign up|place)\b", 3.0),
+    ("create", r"\b(new (user|product|order)|add(ing)? (a|an|new))\b", 1.0),
+    ("update", r"^(please\s+)?(update|change|set|modify|edit|rename|mark|increase|decrease|raise|lower|restock|deactivate|activate|correct)\b", 3.0),
+    ("update", r"\bset\b.+\bto\b|\bchange\b.+\bto\b|\bfrom\b.+\bto\b", 1.0),
+    ("delete", r"^(please\s+)?(delete|remove|drop|erase|purge|wipe|get rid of)\b", 3.0),
+    ("delete", r"\b(delete|remove|erase)\b", 1.0),
+    # Counter-evidence: leading verbs that usually mean another intent here. They only need to pull the
+    # confidence under the threshold, so these requests go to the LLM instead of the wrong write path
+    ("update", r"\badd(ing)?\b.*\bto\s+(the\s+)?(stock|price|quantity|inventory|count)\b|^(please\s+)?add\s+\d+\b.*\bto\b", 2.0),
+    ("update", r"\b(remove|delete|erase|clear)\b.+\bfrom\s+(the\s+)?(product|user|order|item|record|entry|row)\b", 2.0),
+    ("read", r"^(please\s+)?(update|inform|notify)\s+(me|us)\b|\b(let me know|keep me (posted|updated))\b", 3.0),
+    ("read", r"^(please\s+)?(create|make|generate|build|prepare|produce)\s+(me\s+)?(a|an|the)?\s*(\w+\s+)?(report|list|summary|chart|graph|breakdown|overview)\b", 3.0),
+]
+_COMPILED_RULES = [(intent, re.compile(pattern, re.IGNORECASE), weight) for intent, pattern, weight in INTENT_RULES]
+_STRONG_EVIDENCE = 3.0
+
+
+def score_intent(text: str) -> dict[str, float]:
+    text = " ".join(text.strip().split())
+    scores = {"read": 0.0, "create": 0.0, "update": 0.0, "delete": 0.0}
+    for intent, pattern, weight in _COMPILED_RULES:
+        if pattern.search(text):
+            scores[intent] += weight
+    return scores
+
+
+def classify_intent(text: str, threshold: float = INTENT_FAST_PATH_THRESHOLD) -> tuple[str, float] | None:
+    # Returns (intent, confidence) when the rules are confident enough, otherwise None so the caller asks the LLM
+    if not text:
+        return None
+    scores = score_intent(text)
+    intent = max(scores, key=scores.get)
+    best = scores[intent]
+    total = sum(scores.values())
+    if best == 0:
+        return None
+    confidence = (best / total) * min(1.0, best / _STRONG_EVIDENCE)
+    if confidence < threshold:
+        return None
+    return intent, confidence
@@ -1,18 +1,203 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import AIMessage
+import json
 import os
+import threading
+import time
+from dataclasses import dataclass
 from dotenv import load_dotenv
+from core.cache import LLMResponseCache, cache_key
+from core.metrics import record_llm_call
 
 load_dotenv()
-# google_api_key = os.getenv("GOOGLE_API_KEY")
 
-# llm = ChatGoogleGenerativeAI(
-#             model="gemini-2.5-pro",
-#             temperature=0.5,
-#             api_key=google_api_key
-#         )
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
 
 
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+class CachedChatModel:
+    # Wraps a chat model so identical (model, prompt, params) calls are answered from LLMResponseCache.
+    # Pass cache=False to invoke/ainvoke where a fresh completion is required, or set LLM_<ROLE>_CACHE=0
+    # (LLM_READ_FORMATTING_CACHE=0, ...) to turn it off for every call a node makes in that role.
+    def __init__(self, model, cache: LLMResponseCache | None):
+        self.model = model
+        self.cache = cache
+
+    def invoke(self, prompt, *, cache: bool = True, **kwargs):
+        started = time.perf_counter()
+        response = self._invoke(prompt, cache, kwargs)
+        record_llm_call(time.perf_counter() - started, response)
+        return response
+
+    async def ainvoke(self, prompt, *, cache: bool = True, **kwargs):
+        started = time.perf_counter()
+        response = await self._ainvoke(prompt, cache, kwargs)
+        record_llm_call(time.perf_counter() - started, response)
+        return response
+
+    def _invoke(self, prompt, cache: bool, kwargs: dict):
+        if not cache or self.cache is None:
+            return self.model.invoke(prompt, **kwargs)
+        key = self._key(prompt, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return AIMessage(content=cached, response_metadata={"cache_hit": True})
+        response = self.model.invoke(prompt, **kwargs)
+        self._store(key, response)
+        return response
+
+    async def _ainvoke(self, prompt, cache: bool, kwargs: dict):
+        if not cache or self.cache is None:
+            return await self.model.ainvoke(prompt, **kwargs)
+        key = self._key(prompt, kwargs)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            return AIMessage(content=cached, response_metadata={"cache_hit": True})
+        response = await self.model.ainvoke(prompt, **kwargs)
+        content = self._cacheable(response)
+        if content is not None:
+            await self.cache.aput(key, content)
+        return response
+
+    def _key(self, prompt, kwargs: dict) -> str:
+        model_name = getattr(self.model, "model_name", None) or getattr(self.model, "model", "")
+        params = dict(getattr(self.model, "_identifying_params", {}))
+        params.update(kwargs)
+        return cache_key(str(model_name), str(prompt), params)
+
+    def _store(self, key: str, response):
+        content = self._cacheable(response)
+        if content is not None:
+            self.cache.put(key, content)
+
+    @staticmethod
+    def _cacheable(response) -> str | None:
+        content = response.content if hasattr(response, "content") else response
+        return content if isinstance(content, str) else None
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+llm_cache = LLMResponseCache() if LLM_CACHE_ENABLED else None
+
+
+# Per-role generation limits; any of them can be overridden from the environment (see model_spec)
+ROLE_DEFAULTS = {
+    "intent": {"max_tokens": "5", "stop": "\\n", "timeout": "10"},
+    "generation": {"max_tokens": "800", "timeout": "60"},
+    "validation": {"max_tokens": "800", "timeout": "60"},
+    "formatting": {"max_tokens": "1024", "timeout": "60"},
+}
+
+
+DEFAULT_MODELS = {"openai": "gpt-4o-mini", "google": "gemini-2.5-flash", "gemini": "gemini-2.5-flash", "fake": "fake-benchmark-model"}
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    provider: str = "openai"
+    model: str = "gpt-4o-mini"
+    temperature: float = 0.0
+    max_tokens: int | None = None
+    stop: tuple[str, ...] = ()
+    timeout: float | None = None
+    cache: bool = True
+
+
+def _setting(name: str, role: str, intent: str | None) -> str | None:
+    # Most specific wins: LLM_READ_GENERATION_MODEL, then LLM_GENERATION_MODEL, then LLM_MODEL
+    keys = [f"LLM_{role}_{name}", f"LLM_{name}"]
+    if intent:
+        keys.insert(0, f"LLM_{intent}_{role}_{name}")
+    for key in keys:
+        value = os.getenv(key.upper())
+        if value:
+            return value
+    return ROLE_DEFAULTS.get(role, {}).get(name.lower())
+
+
+def _stop_sequences(value: str | None) -> tuple[str, ...]:
+    # JSON list, or a single sequence with backslash escapes ("\\n")
+    if not value:
+        return ()
+    if value.startswith("["):
+        return tuple(json.loads(value))
+    return (value.encode().decode("unicode_escape"),)
+
+
+def model_spec(role: str, intent: str | None = None) -> ModelSpec:
+    provider = (_setting("PROVIDER", role, intent) or "openai").lower()
+    max_tokens = _setting("MAX_TOKENS", role, intent)
+    timeout = _setting("TIMEOUT", role, intent)
+    cache = _setting("CACHE", role, intent)
+    return ModelSpec(
+        provider=provider,
+        model=_setting("MODEL", role, intent) or DEFAULT_MODELS.get(provider, ""),
+        temperature=float(_setting("TEMPERATURE", role, intent) or 0),
+        max_tokens=int(max_tokens) if max_tokens else None,
+        stop=_stop_sequences(_setting("STOP", role, intent)),
+        timeout=float(timeout) if timeout else None,
+        cache=cache != "0",
+    )
+
+
+def build_chat_model(spec: ModelSpec):
+    # Provider SDKs are imported here, on the first client for that provider: each costs 0.5-1 s of
+    # import time, and a deployment usually uses only one of them
+    if spec.provider == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model=spec.model,
+            temperature=spec.temperature,
+            max_tokens=spec.max_tokens,
+            stop=list(spec.stop) or None,
+            timeout=spec.timeout,
+        )
+    if spec.provider in ("google", "gemini"):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(
+            model=spec.model,
+            temperature=spec.temperature,
+            max_output_tokens=spec.max_tokens,
+            stop=list(spec.stop) or None,
+            timeout=spec.timeout,
+            google_api_key=GOOGLE_API_KEY,
+        )
+    if spec.provider == "fake":
+        # Deterministic local stand-in for tests and benchmarks
+        from benchmarks.fake_llm import FakeChatModel
+        return FakeChatModel(latency=float(os.getenv("FAKE_LLM_LATENCY", "0")))
+    raise ValueError(f"Unknown LLM provider: {spec.provider}")
+
+
+_models: dict[ModelSpec, CachedChatModel] = {}
+_models_lock = threading.Lock()
+
+
+def get_llm(role: str, intent: str | None = None) -> CachedChatModel:
+    # Nodes ask for a role (intent, generation, validation, formatting), optionally per intent.
+    # Roles that resolve to the same spec share one client
+    spec = model_spec(role, intent)
+    model = _models.get(spec)
+    if model is None:
+        with _models_lock:
+            model = _models.get(spec)
+            if model is None:
+                model = _models[spec] = CachedChatModel(build_chat_model(spec), llm_cache if spec.cache else None)
+    return model
+
+
+def prewarm_models():
+    # Builds the client for every role and intent the graph can ask for, so the SDK imports and HTTP
+    # client setup happen at startup instead of inside the first request
+    get_llm("intent")
+    for role in ("generation", "validation", "formatting"):
+        for intent in ("read", "create", "update", "delete"):
+            get_llm(role, intent)
+
 
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
\ No newline at end of file
+def reset_models():
+    # Drops the built clients so the next get_llm() re-reads the configuration
+    with _models_lock:
+        _models.clear()
@@ -0,0 +1,139 @@
+import functools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from prometheus_client import Counter, Gauge, Histogram
+
+NODE_METRICS_ENABLED = os.getenv("NODE_METRICS", "1") == "1"
+
+NODE_SECONDS = Histogram("agent_node_seconds", "Wall time per graph node run", ["node"])
+NODE_LLM_SECONDS = Histogram("agent_node_llm_seconds", "Time spent in LLM calls per graph node run", ["node"])
+NODE_SQLITE_SECONDS = Histogram("agent_node_sqlite_seconds", "Time spent holding a SQLite connection per graph node run", ["node"])
+NODE_TOKENS = Counter("agent_node_tokens_total", "LLM tokens reported in response metadata", ["node", "kind"])
+LLM_CALLS = Counter("agent_llm_calls_total", "LLM calls, including ones answered from the response cache", ["node", "cached"])
+CACHE_HITS = Counter("agent_cache_hits_total", "Hits on the LLM, template and result caches", ["node", "cache"])
+COALESCED_REQUESTS = Counter("agent_singleflight_requests_total", "READ requests that ran the graph (leader) or shared a run (follower)", ["role"])
+WRITE_BATCH_SIZE = Histogram("agent_write_batch_size", "Statements committed together by the group-commit writer", buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+READ_ENGINE_QUERIES = Counter("agent_read_engine_queries_total", "READ queries by the engine that answered them; fallback = routed to DuckDB, answered by SQLite", ["engine"])
+GUARDRAIL_TRIPS = Counter("agent_guardrail_trips_total", "Statements stopped by an execution budget", ["intent", "budget"])
+STARTUP_SECONDS = Gauge("agent_startup_seconds", "Time spent importing the app and in the startup hook", ["phase"])
+REQUEST_SECONDS = Histogram("agent_request_seconds", "End-to-end graph run time per API request", ["endpoint", "status"])
+
+# The node currently running in this context and, when a caller asked for it, the per-request breakdown
+_current_node: ContextVar[dict | None] = ContextVar("current_node", default=None)
+_request_timings: ContextVar[list | None] = ContextVar("request_timings", default=None)
+
+
+def _new_record(node: str) -> dict:
+    return {"node": node, "wall_ms": 0.0, "llm_ms": 0.0, "sqlite_ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "cache_hits": []}
+
+
+def _finish(record: dict, started: float):
+    record["wall_ms"] = (time.perf_counter() - started) * 1000
+    node = record["node"]
+    NODE_SECONDS.labels(node).observe(record["wall_ms"] / 1000)
+    NODE_LLM_SECONDS.labels(node).observe(record["llm_ms"] / 1000)
+    NODE_SQLITE_SECONDS.labels(node).observe(record["sqlite_ms"] / 1000)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append(record)
+
+
+def instrument_node(node: str, func, afunc=None):
+    # Returns (func, afunc) wrapped so LLM/SQLite time and tokens recorded while they run are attributed to `node`
+    if not NODE_METRICS_ENABLED:
+        return func, afunc
+
+    @functools.wraps(func)
+    def run(state):
+        record = _new_record(node)
+        token = _current_node.set(record)
+        started = time.perf_counter()
+        try:
+            return func(state)
+        finally:
+            _current_node.reset(token)
+            _finish(record, started)
+
+    if afunc is None:
+        return run, None
+
+    @functools.wraps(afunc)
+    async def arun(state):
+        record = _new_record(node)
+        token = _current_node.set(record)
+        started = time.perf_counter()
+        try:
+            return await afunc(state)
+        finally:
+            _current_node.reset(token)
+            _finish(record, started)
+
+    return run, arun
+
+
+def record_llm_call(seconds: float, response):
+    record = _current_node.get()
+    node = record["node"] if record is not None else "none"
+    metadata = getattr(response, "response_metadata", None) or {}
+    cached = bool(metadata.get("cache_hit"))
+    LLM_CALLS.labels(node, str(cached).lower()).inc()
+    if cached:
+        record_cache_hit("llm")
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens", 0)
+    completion_tokens = usage.get("output_tokens", 0)
+    if not usage:
+        token_usage = metadata.get("token_usage") or {}
+        prompt_tokens = token_usage.get("prompt_tokens", 0)
+        completion_tokens = token_usage.get("completion_tokens", 0)
+    if prompt_tokens:
+        NODE_TOKENS.labels(node, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        NODE_TOKENS.labels(node, "completion").inc(completion_tokens)
+    if record is not None:
+        record["llm_ms"] += seconds * 1000
+        record["prompt_tokens"] += prompt_tokens
+        record["completion_tokens"] += completion_tokens
+
+
+def record_sqlite_time(seconds: float):
+    record = _current_node.get()
+    if record is not None:
+        record["sqlite_ms"] += seconds * 1000
+
+
+def record_cache_hit(cache: str):
+    record = _current_node.get()
+    CACHE_HITS.labels(record["node"] if record is not None else "none", cache).inc()
+    if record is not None:
+        record["cache_hits"].append(cache)
+
+
+@contextmanager
+def track_request():
+    # Collects one record per node run in this context; the list is shared with the graph's node tasks
+    timings = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def request_timings() -> list:
+    # Copy of the node records collected so far for the request this context belongs to
+    return list(_request_timings.get() or [])
+
+
+def timing_breakdown(timings: list) -> dict:
+    nodes = [{key: round(value, 3) if isinstance(value, float) else value for key, value in record.items()} for record in timings]
+    return {
+        "nodes": nodes,
+        "wall_ms": round(sum(record["wall_ms"] for record in timings), 3),
+        "llm_ms": round(sum(record["llm_ms"] for record in timings), 3),
+        "sqlite_ms": round(sum(record["sqlite_ms"] for record in timings), 3),
+        "prompt_tokens": sum(record["prompt_tokens"] for record in timings),
+        "completion_tokens": sum(record["completion_tokens"] for record in timings),
+    }
@@ -1,12 +1,25 @@
-from langchain.prompts import PromptTemplate
+class LazyPrompt:
+    # Holds the template text; the langchain PromptTemplate (and the langchain import) is built on first use
+    def __init__(self, template: str):
+        self.template = template
+        self._prompt = None
 
-schema="""
-users(id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, email TEXT UNIQUE NOT NULL, is_active INTEGER NOT NULL, created_at TEXT NOT NULL)
-products(id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, category TEXT NOT NULL, price REAL NOT NULL, stock INTEGER NOT NULL)
-orders(id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, product_id INTEGER NOT NULL, quantity INTEGER NOT NULL, order_status TEXT NOT NULL, order_date TEXT NOT NULL, FOREIGN KEY(user_id) REFERENCES users(id), FOREIGN KEY(product_id) REFERENCES products(id)
-"""
+    def format(self, **kwargs) -> str:
+        return self._built().format(**kwargs)
+
+    def _built(self):
+        if self._prompt is None:
+            from langchain.prompts import PromptTemplate
+            self._prompt = PromptTemplate.from_template(self.template)
+        return self._prompt
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._built(), name)
 
-intent_classification_prompt = PromptTemplate.from_template("""
+
+intent_classification_prompt = LazyPrompt("""
 Given the following user request, classify the intended database operation as one of the following:
 - "read" (query existing data)
 - "create" (add new data)
@@ -18,7 +31,7 @@ User request: {input}
 Respond only with one word: read, create, update, or delete.
 """)
 
-read_query_generation_prompt = PromptTemplate.from_template("""
+read_query_generation_prompt = LazyPrompt("""
 You are an expert SQL developer.
 Given the following SQLite database schema and a natural language question, generate a syntactically valid SQL query that answers the question.
 Schema:
@@ -35,7 +48,7 @@ Question: {input}
 SQL Query:
 """)
 
-read_query_validation_prompt = PromptTemplate.from_template("""
+read_query_validation_prompt = LazyPrompt("""
 You are a meticulous SQL validator.
 Check the provided SQL query for common mistakes, including:
 - Syntax errors
@@ -64,7 +77,7 @@ Validated and (if needed) corrected SQL Query:
 """)
 
 
-read_result_formatting_prompt = PromptTemplate.from_template("""
+read_result_formatting_prompt = LazyPrompt("""
 You are an assistant helping users understand database results.
 - Only use the data in {results} to answer the user's question.
 - Write your reply in clear, natural language suitable for non-technical users.
@@ -78,7 +91,7 @@ Data: {results}
 
 
 # -----CREATE-----
-create_query_generation_prompt = PromptTemplate.from_template("""
+create_query_generation_prompt = LazyPrompt("""
 You are an expert SQL developer.
 Given the following SQLite database schema and a natural language request, generate a syntactically valid SQL INSERT query that adds a new row into the appropriate table.
 
@@ -102,7 +115,7 @@ SQL Query:
 """)
 
 
-create_query_validation_prompt = PromptTemplate.from_template("""
+create_query_validation_prompt = LazyPrompt("""
 You are a meticulous SQL validator.
 Check the provided SQL INSERT query for common mistakes, including:
 - Syntax errors
@@ -132,7 +145,7 @@ User request: {input}
 Validated and (if needed) corrected SQL Query:
 """)
 
-create_result_formatting_prompt = PromptTemplate.from_template("""
+create_result_formatting_prompt = LazyPrompt("""
 You are a helpful assistant. Summarize the result of this database operation for the user:
 - If a new item was created, clearly state what was added and include all relevant details from {results}.
 - If the operation was not successful, provide a friendly, plain-language explanation of the error.
@@ -143,7 +156,7 @@ Data: {results}
 """)
 
 #----UPDATE-----
-update_query_generation_prompt = PromptTemplate.from_template("""
+update_query_generation_prompt = LazyPrompt("""
 You are an expert SQL developer.
 Given the following SQLite database schema and a natural language request, generate a syntactically valid SQL UPDATE query to modify existing data in the appropriate table.
 
@@ -167,7 +180,7 @@ Natural language request: {input}
 SQL Query:
 """)
 
-update_query_validation_prompt = PromptTemplate.from_template("""
+update_query_validation_prompt = LazyPrompt("""
 You are a meticulous SQL validator.
 Check the provided SQL UPDATE query for common mistakes, including:
 - Syntax errors
@@ -198,7 +211,7 @@ User request: {input}
 Validated and (if needed) corrected SQL Query:
 """)
 
-update_result_formatting_prompt = PromptTemplate.from_template("""
+update_result_formatting_prompt = LazyPrompt("""
 You are a helpful assistant. Summarize the result of this database UPDATE operation for the user:
 - If the update was successful, clearly state what was changed or updated, mentioning the updated fields and the number of affected items if possible (based on {results}).
 - If the operation was not successful, provide a friendly, plain-language explanation of the error.
@@ -209,7 +222,7 @@ Data: {results}
 """)
 
 # ----DELETE-----
-delete_query_generation_prompt = PromptTemplate.from_template("""
+delete_query_generation_prompt = LazyPrompt("""
 You are an expert SQL developer.
 Given the following SQLite database schema and a natural language request from the user, generate a syntactically valid SQL DELETE query to remove data from the correct table.
 
@@ -235,7 +248,7 @@ SQL Query:
 """)
 
 
-delete_query_validation_prompt = PromptTemplate.from_template("""
+delete_query_validation_prompt = LazyPrompt("""
 You are a meticulous SQL validator.
 Given a user's intent, a SQL DELETE query, and the database schema, check for and fix errors in the query:
 
@@ -264,11 +277,37 @@ Original SQL Query:
 Validated and corrected SQL Query:
 """)
 
-delete_result_formatting_prompt = PromptTemplate.from_template("""
+delete_result_formatting_prompt = LazyPrompt("""
 You are a helpful assistant. Summarize the result of this database DELETE operation for the user:
 - If the deletion was successful, clearly state what was removed, mentioning the type of items and the number of deleted records if possible (based on {results}).
 - If the operation was not successful, provide a friendly, plain-language explanation of the error.
 - Do not mention SQL, technical steps, or system details in your response.
 - Make your reply natural, brief, and easy for a non-technical user to understand.
 
-Data: {results} """)
\ No newline at end of file
+Data: {results} """)
+
+# -----SINGLE-CALL GENERATE+VALIDATE-----
+self_check_instructions = """
+Before answering, check your query yourself for syntax errors, non-existent tables or columns, wrong value types, missing quotes around text values and SQLite dialect mismatches, and fix anything you find.
+
+Respond only with a JSON object (no code fences, no explanation) of the form:
+{{"sql": "<the final SQL statement>", "verdict": "valid"}}
+Set "verdict" to "uncertain" instead if you had to guess a table, column, value or condition, or if you could not produce a query (then put your one-line message in "sql").
+"""
+
+def with_self_check(prompt: LazyPrompt) -> LazyPrompt:
+    # Same generation instructions, but the answer is the final SQL plus a self-check verdict
+    template = prompt.template.rstrip().removesuffix("SQL Query:")
+    return LazyPrompt(template + self_check_instructions)
+
+read_query_generation_checked_prompt = with_self_check(read_query_generation_prompt)
+create_query_generation_checked_prompt = with_self_check(create_query_generation_prompt)
+update_query_generation_checked_prompt = with_self_check(update_query_generation_prompt)
+delete_query_generation_checked_prompt = with_self_check(delete_query_generation_prompt)
+
+
+def build_prompts():
+    # Startup pre-warm: parses every template now instead of on the first request that needs it
+    for value in list(globals().values()):
+        if isinstance(value, LazyPrompt):
+            value._built()
@@ -0,0 +1,35 @@
+import asyncio
+import os
+from core.intent import score_intent
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT", "1") == "1"
+
+
+def coalesce_key(text: str) -> str | None:
+    # Only inputs the rules read as plain READs, with no create/update/delete evidence at all, are ever shared
+    if not SINGLEFLIGHT_ENABLED or not text:
+        return None
+    scores = score_intent(text)
+    if scores["read"] == 0 or any(score for intent, score in scores.items() if intent != "read"):
+        return None
+    return " ".join(text.split()).rstrip("?.! ")
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution; a call after it finished starts a new one
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, func) -> tuple[object, bool]:
+        # Returns (result, shared). The work runs in its own task, so a caller that goes away
+        # (client disconnect) doesn't cancel it for the others
+        task = self._inflight.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.create_task(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), shared
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import time
+import aiosqlite
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "data/checkpoints.db")
+# A run paused for approval (or left behind by a crashed worker) is deleted once it is this old
+CHECKPOINT_TTL_SECONDS = float(os.getenv("CHECKPOINT_TTL_SECONDS", str(24 * 3600)))
+CHECKPOINT_SWEEP_SECONDS = float(os.getenv("CHECKPOINT_SWEEP_SECONDS", "600"))
+
+# One row per paused run that an approval has started resuming; the primary key makes claiming a check-and-set
+_CLAIMS_TABLE = "CREATE TABLE IF NOT EXISTS approval_claims (thread_id TEXT PRIMARY KEY, claimed_at REAL NOT NULL)"
+_CLAIM = "INSERT OR IGNORE INTO approval_claims (thread_id, claimed_at) VALUES (?, ?)"
+_RELEASE = "DELETE FROM approval_claims WHERE thread_id = ?"
+# Every API thread that still has checkpoints, with the time it started or last paused
+_THREADS_TABLE = "CREATE TABLE IF NOT EXISTS checkpoint_threads (thread_id TEXT PRIMARY KEY, touched_at REAL NOT NULL)"
+
+def sqlite_checkpointer(path: str = CHECKPOINT_DB_PATH) -> SqliteSaver:
+    # Paused CUD runs are stored here under their thread id until the user approves or rejects them
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute(_CLAIMS_TABLE)
+    conn.commit()
+    return SqliteSaver(conn)
+
+async def async_sqlite_checkpointer(path: str = CHECKPOINT_DB_PATH) -> AsyncSqliteSaver:
+    # Must be created inside the running event loop; used by app.ainvoke in the API
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = await aiosqlite.connect(path)
+    await conn.execute(_CLAIMS_TABLE)
+    await conn.execute(_THREADS_TABLE)
+    await conn.commit()
+    return AsyncSqliteSaver(conn)
+
+def claim_thread(saver: SqliteSaver, thread_id: str) -> bool:
+    # True for exactly one caller per thread_id, across requests and worker processes sharing the file
+    with saver.lock:
+        cursor = saver.conn.execute(_CLAIM, (thread_id, time.time()))
+        saver.conn.commit()
+    return cursor.rowcount == 1
+
+async def aclaim_thread(saver: AsyncSqliteSaver, thread_id: str) -> bool:
+    async with saver.lock:
+        cursor = await saver.conn.execute(_CLAIM, (thread_id, time.time()))
+        await saver.conn.commit()
+    return cursor.rowcount == 1
+
+def release_thread(saver: SqliteSaver, thread_id: str):
+    # After a failed resume, so the approval can be retried from the last checkpoint
+    with saver.lock:
+        saver.conn.execute(_RELEASE, (thread_id,))
+        saver.conn.commit()
+
+async def arelease_thread(saver: AsyncSqliteSaver, thread_id: str):
+    async with saver.lock:
+        await saver.conn.execute(_RELEASE, (thread_id,))
+        await saver.conn.commit()
+
+async def atouch_thread(saver: AsyncSqliteSaver, thread_id: str):
+    async with saver.lock:
+        await saver.conn.execute(
+            "INSERT OR REPLACE INTO checkpoint_threads (thread_id, touched_at) VALUES (?, ?)", (thread_id, time.time())
+        )
+        await saver.conn.commit()
+
+async def aforget_thread(saver: AsyncSqliteSaver, thread_id: str):
+    # Drops the checkpoints and writes of a finished, rejected or expired run
+    await saver.adelete_thread(thread_id)
+    async with saver.lock:
+        await saver.conn.execute("DELETE FROM checkpoint_threads WHERE thread_id = ?", (thread_id,))
+        await saver.conn.execute(_RELEASE, (thread_id,))
+        await saver.conn.commit()
+
+async def asweep_threads(saver: AsyncSqliteSaver, ttl: float = CHECKPOINT_TTL_SECONDS) -> int:
+    async with saver.lock:
+        async with saver.conn.execute(
+            "SELECT thread_id FROM checkpoint_threads WHERE touched_at < ?", (time.time() - ttl,)
+        ) as cursor:
+            expired = [row[0] for row in await cursor.fetchall()]
+    for thread_id in expired:
+        await aforget_thread(saver, thread_id)
+    return len(expired)
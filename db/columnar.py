@@ -0,0 +1,227 @@
+import csv
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from functools import lru_cache
+from core.metrics import READ_ENGINE_QUERIES
+from db.connection import DB_PATH, connect, get_pool
+from db.guardrails import BudgetExceeded, check_rows, guarded, row_limit, timeout_seconds, budget_exceeded
+from db.pagination import fetch_rows
+
+# sqlite: every READ runs on SQLite. auto: aggregations over large tables run on a DuckDB snapshot when duckdb is installed
+READ_ENGINE = os.getenv("READ_ENGINE", "auto")
+# Smallest total row count of the referenced tables worth routing to the columnar engine
+COLUMNAR_MIN_ROWS = int(os.getenv("COLUMNAR_MIN_ROWS", "200000"))
+# Minimum interval between snapshot rebuilds; reads go to SQLite while the snapshot is stale
+COLUMNAR_REFRESH_SECONDS = float(os.getenv("COLUMNAR_REFRESH_SECONDS", "30"))
+
+_AGGREGATE = re.compile(r"\bGROUP\s+BY\b|\b(?:COUNT|SUM|AVG|MIN|MAX)\s*\(", re.IGNORECASE)
+# Constructs whose SQLite semantics DuckDB doesn't share: integer division, case-insensitive LIKE,
+# date modifiers such as date('now', '-30 days'), type-dependent functions, CAST (SQLite truncates 2.7 to 2,
+# DuckDB rounds to 3) and scalar MIN(a, b)/MAX(a, b), which DuckDB rejects
+_SQLITE_ONLY = re.compile(
+    r"/|\b(?:LIKE|GLOB|REGEXP|MATCH)\b|\b(?:date|time|datetime|julianday|strftime|unixepoch|printf|format|instr|"
+    r"typeof|total|group_concat|random|changes|last_insert_rowid|hex|quote|zeroblob|likelihood|cast)\s*\(|"
+    r"\b(?:MIN|MAX)\s*\((?:[^()]|\([^()]*\))*,",
+    re.IGNORECASE,
+)
+# A number in quotes: SQLite never finds 1 = '1' without a column affinity, DuckDB casts the string and does
+_QUOTED_NUMBER = re.compile(r"'\s*[-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?\s*'", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_TYPES = {"INT": "BIGINT", "REAL": "DOUBLE", "FLOA": "DOUBLE", "DOUB": "DOUBLE", "NUM": "DOUBLE", "BOOL": "BIGINT"}
+
+
+def _duckdb_type(declared: str) -> str:
+    declared = declared.upper()
+    for affinity, duck_type in _TYPES.items():
+        if affinity in declared:
+            return duck_type
+    return "VARCHAR"
+
+
+@lru_cache(maxsize=1)
+def _duckdb_installed() -> bool:
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _plain(value):
+    # DuckDB returns DECIMAL for literals like 0.1; SQLite would have produced a float
+    return float(value) if isinstance(value, Decimal) else value
+
+
+class ColumnarEngine:
+    # In-memory DuckDB copy of the SQLite tables for aggregations. The snapshot is tagged with SQLite's
+    # data_version, so a query only runs on it while no write has committed since it was taken
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._db = None
+        self._version = None
+        self._row_counts = {}
+        self._watcher = None
+        self._watcher_pid = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._refresh_started = float("-inf")
+        self.refreshes = 0
+        self.last_refresh_seconds = None
+
+    def available(self) -> bool:
+        return READ_ENGINE == "auto" and _duckdb_installed()
+
+    def routes(self, sql: str) -> bool:
+        # Query shape first: only aggregations without SQLite-specific constructs, over enough rows to pay off.
+        # The size check comes before _fresh, so small tables never cause a snapshot to be taken
+        text = _STRING.sub("''", sql)
+        if not _AGGREGATE.search(text) or _SQLITE_ONLY.search(text) or _QUOTED_NUMBER.search(sql):
+            return False
+        if self._estimated_rows(set(re.findall(r"\w+", text.lower()))) < COLUMNAR_MIN_ROWS:
+            return False
+        return self._fresh()
+
+    def execute(self, sql: str, limit: int, timeout: float | None = None) -> tuple[list[str], list, bool]:
+        import duckdb
+
+        cursor = self._db.cursor()
+        # DuckDB has no progress handler; a timer interrupts the statement at the deadline instead
+        timer = threading.Timer(timeout, cursor.interrupt) if timeout else None
+        try:
+            if timer is not None:
+                timer.start()
+            cursor.execute(sql)
+            rows, has_more = fetch_rows(cursor, limit)
+            columns = [column[0] for column in cursor.description or []]
+        except duckdb.InterruptException as e:
+            raise budget_exceeded("read", "timeout", int(timeout * 1000)) from e
+        finally:
+            if timer is not None:
+                timer.cancel()
+            cursor.close()
+        return columns, [tuple(_plain(value) for value in row) for row in rows], has_more
+
+    def refresh(self):
+        import duckdb
+
+        started = time.perf_counter()
+        with self._lock:
+            # Read before copying: a commit during the copy then just makes the snapshot look stale
+            version = self._data_version()
+        db = duckdb.connect()
+        db.execute("SET default_null_order = 'nulls_first_on_asc_last_on_desc'")
+        row_counts = {}
+        source = connect(self.path, readonly=True)
+        try:
+            # One read transaction, so every table comes from the same commit
+            source.execute("BEGIN")
+            tables = [row[0] for row in source.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )]
+            with tempfile.TemporaryDirectory(prefix="columnar-") as workdir:
+                for table in tables:
+                    columns = [f'"{column[1]}" {_duckdb_type(column[2])}' for column in source.execute(f'PRAGMA table_info("{table}")')]
+                    db.execute(f'CREATE TABLE "{table}" ({", ".join(columns)})')
+                    path = os.path.join(workdir, f"{table}.csv")
+                    with open(path, "w", newline="") as f:
+                        writer = csv.writer(f)
+                        count = 0
+                        for row in source.execute(f'SELECT * FROM "{table}"'):
+                            writer.writerow(r"\N" if value is None else value for value in row)
+                            count += 1
+                    db.execute(f"""COPY "{table}" FROM '{path}' (FORMAT csv, HEADER false, DELIMITER ',', QUOTE '"', ESCAPE '"', NULL '\\N')""")
+                    row_counts[table] = count
+            source.execute("COMMIT")
+        finally:
+            source.close()
+        with self._lock:
+            self._db, self._version, self._row_counts = db, version, row_counts
+            self.refreshes += 1
+            self.last_refresh_seconds = round(time.perf_counter() - started, 3)
+
+    def stats(self) -> dict:
+        return {
+            "engine": "duckdb" if self.available() else "sqlite",
+            "snapshot_rows": dict(self._row_counts),
+            "refreshes": self.refreshes,
+            "last_refresh_seconds": self.last_refresh_seconds,
+        }
+
+    def _estimated_rows(self, words: set[str]) -> int:
+        # Read from SQLite rather than the snapshot, which may not exist yet. MAX(rowid) is one b-tree seek and
+        # matches the row count of a table that is only appended to
+        total = 0
+        with get_pool().connection() as conn:
+            tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'").fetchall()
+            for (table,) in tables:
+                if table.lower() not in words:
+                    continue
+                try:
+                    total += conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+                except sqlite3.OperationalError:
+                    # WITHOUT ROWID table
+                    total += conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        return total
+
+    def _fresh(self) -> bool:
+        with self._lock:
+            if self._db is not None and self._version == self._data_version():
+                return True
+            if self._refreshing or time.monotonic() - self._refresh_started < COLUMNAR_REFRESH_SECONDS:
+                return False
+            self._refreshing = True
+            self._refresh_started = time.monotonic()
+        # Not a daemon: DuckDB aborts the process if interpreter shutdown kills a thread mid-copy. Explicit, because
+        # the flag is otherwise inherited and reads start this from daemon worker threads
+        threading.Thread(target=self._background_refresh, name="columnar-refresh", daemon=False).start()
+        return False
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        finally:
+            self._refreshing = False
+
+    def _data_version(self) -> int:
+        # Same watcher idea as the result cache: a connection that never writes sees every other commit
+        if self._watcher is None or self._watcher_pid != os.getpid():
+            self._watcher = connect(self.path, readonly=True)
+            self._watcher_pid = os.getpid()
+        return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+
+def execute_read(sql: str, limit: int) -> tuple[list[str], list, bool, str]:
+    # Returns (columns, rows, has_more, engine). DuckDB errors fall back to SQLite, and so do results longer
+    # than one page: further pages are read from SQLite, whose row order the first page must match
+    if columnar_engine.available() and columnar_engine.routes(sql):
+        try:
+            _, rows, has_more = columnar_engine.execute(sql, row_limit("read", 0, limit), timeout_seconds("read"))
+            check_rows("read", 0, len(rows), has_more)
+            if not has_more:
+                # Name columns the way SQLite does (COUNT(*) rather than count_star()); LIMIT 0 plans without running
+                with get_pool().connection() as conn:
+                    columns = [column[0] for column in conn.execute(f"SELECT * FROM (\n{sql}\n) LIMIT 0").description]
+                READ_ENGINE_QUERIES.labels("duckdb").inc()
+                return columns, rows, has_more, "duckdb"
+        except BudgetExceeded:
+            raise
+        except Exception:
+            pass
+        READ_ENGINE_QUERIES.labels("fallback").inc()
+    with get_pool().connection() as conn, guarded(conn, "read"):
+        c = conn.cursor()
+        c.execute(sql)
+        # Bounded: at most one page is materialised, the rest is reachable through next_cursor
+        rows, has_more = fetch_rows(c, row_limit("read", 0, limit))
+        check_rows("read", 0, len(rows), has_more)
+        columns = [column[0] for column in c.description or []]
+    READ_ENGINE_QUERIES.labels("sqlite").inc()
+    return columns, rows, has_more, "sqlite"
+
+
+columnar_engine = ColumnarEngine()
@@ -0,0 +1,109 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+from core.metrics import record_sqlite_time
+
+DB_PATH = os.getenv("DB_PATH", "data/apps.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", os.getenv("DB_MAX_WORKERS", "4")))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", "5.0"))
+# Pooled connections are read-only; every write goes through the single writer in db/write_queue.py
+DB_READ_ONLY_POOL = os.getenv("DB_READ_ONLY_POOL", "1") == "1"
+
+
+def connect(path: str = DB_PATH, readonly: bool = False) -> sqlite3.Connection:
+    # One-time tuning per connection: WAL lets readers run during a commit, NORMAL skips the fsync per transaction in WAL mode
+    conn = sqlite3.connect(
+        f"file:{quote(os.path.abspath(path))}?mode=ro" if readonly else path,
+        timeout=DB_BUSY_TIMEOUT,
+        check_same_thread=False,
+        cached_statements=DB_STATEMENT_CACHE_SIZE,
+        uri=readonly,
+    )
+    if readonly:
+        # mode=ro is enforced by the file handle, query_only by SQLite itself, so even PRAGMA writes are refused
+        conn.execute("PRAGMA query_only=1")
+    else:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+    return conn
+
+
+class ConnectionPool:
+    def __init__(self, path: str = DB_PATH, size: int = DB_POOL_SIZE, readonly: bool = DB_READ_ONLY_POOL):
+        self.path = path
+        self.size = size
+        self.readonly = readonly
+        if readonly:
+            # Only a read-write connection can switch the file to WAL; read-only ones then never block the writer
+            connect(path).close()
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        started = time.perf_counter()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            # Never hand a connection with an open transaction to the next caller
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+            record_sqlite_time(time.perf_counter() - started)
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return connect(self.path, self.readonly)
+        # Pool exhausted: wait for a connection to be returned
+        return self._idle.get()
+
+    def prewarm(self):
+        # Opens the connections not created yet, so the first requests don't pay for connect() and the PRAGMAs
+        with self._lock:
+            missing = self.size - self._created
+            self._created = self.size
+        for _ in range(missing):
+            self._idle.put(connect(self.path, self.readonly))
+
+    def close(self):
+        # Shutdown only: closes the idle connections
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    # One pool per process; a forked worker builds its own instead of sharing the parent's handles
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool()
+                _pool_pid = os.getpid()
+    return _pool
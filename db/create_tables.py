@@ -1,13 +1,27 @@
+import argparse
 import sqlite3
 import os
+import sys
 from datetime import datetime, timedelta
 import random
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db.synthetic import BATCH_SIZE, bulk_load, replace_database, stage_database
+
+parser = argparse.ArgumentParser(description="Create the tables and load sample data")
+parser.add_argument("--scale", type=float, default=0, help="also bulk-load synthetic rows; 1 = 10k users, 1k products, 100k orders")
+parser.add_argument("--seed", type=int, default=42, help="random seed for sample and synthetic rows")
+parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per executemany call")
+args = parser.parse_args()
+random.seed(args.seed)
+
 # Ensure "data" directory exists
 os.makedirs("data", exist_ok=True)
 
-# Connect to database
-conn = sqlite3.connect("data/apps.db")
+# Connect to database. A bulk load is built in a staging file that replaces apps.db only once it is complete
+DB_FILE = "data/apps.db"
+staging = stage_database(DB_FILE) if args.scale > 0 else None
+conn = sqlite3.connect(staging or DB_FILE)
 c = conn.cursor()
 
 RESET_DATABASE = True 
@@ -181,4 +195,12 @@ orders = [
 c.executemany("INSERT OR IGNORE INTO orders (user_id, product_id, quantity, order_status, order_date) VALUES (?, ?, ?, ?, ?)", orders)
 
 conn.commit()
-conn.close()
\ No newline at end of file
+
+if args.scale > 0:
+    report = bulk_load(conn, args.scale, args.seed, args.batch_size)
+    for table, entry in report.items():
+        print(f"{table:>10}: {entry['rows']:>10} rows in {entry['seconds']:>8.2f}s ({entry['rows_per_s']} rows/s)")
+
+conn.close()
+if staging:
+    replace_database(staging, DB_FILE)
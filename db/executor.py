@@ -0,0 +1,15 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", "4"))
+
+# Bounded pool so blocking sqlite3 work never runs on the event loop and never fans out unbounded
+_db_executor = ThreadPoolExecutor(max_workers=DB_MAX_WORKERS, thread_name_prefix="sqlite")
+
+async def run_in_db_executor(func, *args):
+    # Copy the context so langgraph's config (needed by interrupt()) is visible inside the worker thread
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_db_executor, ctx.run, func, *args)
@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from core.metrics import GUARDRAIL_TRIPS
+
+# VM instructions between progress-handler calls; each call checks the step and time budgets
+PROGRESS_INTERVAL = int(os.getenv("QUERY_PROGRESS_INTERVAL", "1000"))
+
+
+@dataclass(frozen=True)
+class Budget:
+    # 0 disables a limit
+    timeout_ms: int
+    max_steps: int
+    max_rows: int
+    max_affected: int
+
+
+_DEFAULTS = {
+    "read": Budget(timeout_ms=10000, max_steps=200_000_000, max_rows=10000, max_affected=0),
+    "create": Budget(timeout_ms=5000, max_steps=50_000_000, max_rows=0, max_affected=100),
+    "update": Budget(timeout_ms=5000, max_steps=50_000_000, max_rows=0, max_affected=1000),
+    "delete": Budget(timeout_ms=5000, max_steps=50_000_000, max_rows=0, max_affected=1000),
+}
+
+_MESSAGES = {
+    "timeout": "Query stopped: it ran longer than the {limit} ms time budget for {intent} queries.",
+    "steps": "Query stopped: it exceeded the {limit} step budget for {intent} queries. Add filters or avoid cross joins.",
+    "rows": "Query stopped: the result has more than the {limit} rows allowed for {intent} queries. Add filters or aggregate.",
+    "affected": "Query rolled back: it would change more than the {limit} rows allowed for one {intent} statement.",
+}
+
+
+def _limit(name: str, intent: str, default: int) -> int:
+    # QUERY_TIMEOUT_MS_DELETE beats QUERY_TIMEOUT_MS beats the per-intent default
+    value = os.getenv(f"{name}_{intent.upper()}") or os.getenv(name)
+    return int(value) if value else default
+
+
+BUDGETS = {
+    intent: Budget(
+        timeout_ms=_limit("QUERY_TIMEOUT_MS", intent, default.timeout_ms),
+        max_steps=_limit("QUERY_MAX_STEPS", intent, default.max_steps),
+        max_rows=_limit("QUERY_MAX_ROWS", intent, default.max_rows),
+        max_affected=_limit("QUERY_MAX_AFFECTED", intent, default.max_affected),
+    )
+    for intent, default in _DEFAULTS.items()
+}
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, intent: str, budget: str, limit: int):
+        self.intent = intent
+        self.budget = budget
+        self.limit = limit
+        super().__init__(_MESSAGES[budget].format(limit=limit, intent=intent))
+
+
+def budget_exceeded(intent: str, budget: str, limit: int) -> BudgetExceeded:
+    # Counts the trip; the caller raises the returned error
+    GUARDRAIL_TRIPS.labels(intent, budget).inc()
+    return BudgetExceeded(intent, budget, limit)
+
+
+def budget_for(intent: str | None) -> Budget | None:
+    return BUDGETS.get(intent) if intent else None
+
+
+@contextmanager
+def guarded(conn, intent: str | None):
+    # Time and step budgets through SQLite's progress handler: returning non-zero interrupts the running
+    # statement, which then raises OperationalError("interrupted")
+    budget = budget_for(intent)
+    if budget is None or not (budget.timeout_ms or budget.max_steps):
+        yield
+        return
+    deadline = time.monotonic() + budget.timeout_ms / 1000 if budget.timeout_ms else None
+    progress = {"steps": 0, "tripped": None}
+
+    def check():
+        progress["steps"] += PROGRESS_INTERVAL
+        if budget.max_steps and progress["steps"] > budget.max_steps:
+            progress["tripped"] = "steps"
+        elif deadline is not None and time.monotonic() > deadline:
+            progress["tripped"] = "timeout"
+        return progress["tripped"] is not None
+
+    conn.set_progress_handler(check, PROGRESS_INTERVAL)
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if progress["tripped"] is None:
+            raise
+        limit = budget.max_steps if progress["tripped"] == "steps" else budget.timeout_ms
+        raise budget_exceeded(intent, progress["tripped"], limit) from e
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def row_limit(intent: str, offset: int, limit: int) -> int:
+    # Rows to fetch for a page starting at offset without reading past the row budget
+    budget = budget_for(intent)
+    if budget is None or not budget.max_rows:
+        return limit
+    return max(0, min(limit, budget.max_rows - offset))
+
+
+def check_rows(intent: str, offset: int, count: int, has_more: bool):
+    budget = budget_for(intent)
+    if budget is not None and budget.max_rows and has_more and offset + count >= budget.max_rows:
+        raise budget_exceeded(intent, "rows", budget.max_rows)
+
+
+def check_affected(intent: str | None, rowcount: int):
+    # Called after the statement ran but before its transaction or savepoint is released, so a trip rolls it back
+    budget = budget_for(intent)
+    if budget is not None and budget.max_affected and rowcount > budget.max_affected:
+        raise budget_exceeded(intent, "affected", budget.max_affected)
+
+
+def timeout_seconds(intent: str) -> float | None:
+    budget = budget_for(intent)
+    return budget.timeout_ms / 1000 if budget is not None and budget.timeout_ms else None
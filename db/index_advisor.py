@@ -0,0 +1,322 @@
+import os
+import re
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from db.connection import DB_PATH, connect
+from db.guardrails import BudgetExceeded, guarded
+from db.schema import read_schema
+from db.sql_validator import clean_sql
+
+INDEX_ADVISOR_ENABLED = os.getenv("INDEX_ADVISOR", "1") == "1"
+# Opt-in: create a proposed index once this many observed queries would have used it
+INDEX_ADVISOR_AUTO_CREATE = os.getenv("INDEX_ADVISOR_AUTO_CREATE", "0") == "1"
+INDEX_ADVISOR_MIN_QUERIES = int(os.getenv("INDEX_ADVISOR_MIN_QUERIES", "20"))
+INDEX_ADVISOR_MAX_COLUMNS = int(os.getenv("INDEX_ADVISOR_MAX_COLUMNS", "4"))
+INDEX_ADVISOR_PLAN_CACHE = int(os.getenv("INDEX_ADVISOR_PLAN_CACHE", "2048"))
+# Opt-in: GET /index-advisor?measure=true copies the database and times every proposal on the copy
+INDEX_ADVISOR_MEASURE = os.getenv("INDEX_ADVISOR_MEASURE", "0") == "1"
+# Assumed share of rows a range predicate keeps when estimating speedups
+RANGE_SELECTIVITY = 0.25
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SOURCE = re.compile(
+    r"\b(?:FROM|JOIN)\s+\"?(\w+)\"?(?:\s+(?:AS\s+)?(?!(?:ON|WHERE|JOIN|LEFT|RIGHT|INNER|OUTER|CROSS|NATURAL|GROUP|ORDER|LIMIT|USING|HAVING|UNION)\b)(\w+))?",
+    re.IGNORECASE,
+)
+_OPERAND = r"(?:(\w+)\.)?\"?(\w+)\"?"
+_COMPARISON = re.compile(
+    rf"(?<![\w.(]){_OPERAND}\s*(==|=|<=|>=|<>|!=|<|>|\bIN\b|\bIS\b|\bBETWEEN\b|\bLIKE\b)\s*(\(?\s*{_OPERAND}|[^\s]+)",
+    re.IGNORECASE,
+)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|$)", re.IGNORECASE | re.DOTALL)
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$")
+_EQUALITY = {"=", "==", "IN", "IS"}
+
+
+class IndexAdvisor:
+    # Runs EXPLAIN QUERY PLAN once per distinct validated SELECT, turns full-table SCANs into index proposals
+    # and aggregates them over all observed executions
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._conn = None
+        self._schema = None
+        self._lock = threading.Lock()
+        self._plans = OrderedDict()
+        self._proposals = {}
+        self._created = set()
+        self.observed = 0
+        self.unindexable_scans = 0
+
+    def observe(self, sql, elapsed_ms: float):
+        if not INDEX_ADVISOR_ENABLED:
+            return
+        sql = clean_sql(sql)
+        with self._lock:
+            self.observed += 1
+            candidates = self._plans.get(sql)
+            if candidates is None:
+                candidates = self._analyze(sql)
+                self._plans[sql] = candidates
+                while len(self._plans) > INDEX_ADVISOR_PLAN_CACHE:
+                    self._plans.popitem(last=False)
+            else:
+                self._plans.move_to_end(sql)
+            for table, columns, equality, ranged in candidates:
+                proposal = self._proposals.setdefault(
+                    (table, columns), {"queries": 0, "ms": 0.0, "examples": [], "equality": equality, "range": ranged}
+                )
+                proposal["queries"] += 1
+                proposal["ms"] += elapsed_ms
+                if len(proposal["examples"]) < 3 and sql not in proposal["examples"]:
+                    proposal["examples"].append(sql)
+            ready = []
+            if INDEX_ADVISOR_AUTO_CREATE and candidates:
+                for key, proposal in self._merged().items():
+                    if proposal["queries"] >= INDEX_ADVISOR_MIN_QUERIES and not self._covered(key):
+                        self._created.add(key)
+                        ready.append(key)
+        for table, columns in ready:
+            self._create(table, columns)
+
+    def proposals(self) -> list[dict]:
+        with self._lock:
+            items = sorted(self._merged().items(), key=lambda item: item[1]["ms"], reverse=True)
+            return [
+                {
+                    "table": table,
+                    "columns": list(columns),
+                    "statement": index_statement(table, columns),
+                    "queries": proposal["queries"],
+                    "observed_ms": round(proposal["ms"], 3),
+                    "created": self._covered((table, columns)),
+                    "examples": proposal["examples"],
+                    "equality_columns": proposal["equality"],
+                    "range": proposal["range"],
+                    "replaces": proposal["replaces"],
+                }
+                for (table, columns), proposal in items
+            ]
+
+    def _merged(self) -> dict:
+        # An index on (a, b) also serves every query that wanted (a): a proposal that is a prefix of a longer
+        # one on the same table is folded into it, so only the longer index is reported and built
+        merged = {}
+        for (table, columns), proposal in sorted(self._proposals.items(), key=lambda item: -len(item[0][1])):
+            target = next((key for key in merged if key[0] == table and key[1][:len(columns)] == columns), None)
+            if target is None:
+                merged[(table, columns)] = {**proposal, "examples": list(proposal["examples"]), "replaces": []}
+                continue
+            entry = merged[target]
+            entry["queries"] += proposal["queries"]
+            entry["ms"] += proposal["ms"]
+            entry["replaces"].append(list(columns))
+            for sql in proposal["examples"]:
+                if len(entry["examples"]) < 3 and sql not in entry["examples"]:
+                    entry["examples"].append(sql)
+        return merged
+
+    def _covered(self, key: tuple[str, tuple[str, ...]]) -> bool:
+        table, columns = key
+        return any(created[0] == table and created[1][:len(columns)] == columns for created in self._created)
+
+    def report(self, measure: bool = False, repeat: int = 5) -> dict:
+        # Estimated speedup from row counts and column cardinality; measured speedup from running the
+        # example queries on a copy of the database before and after creating the index
+        proposals = self.proposals()
+        with self._lock:
+            conn = self._connection()
+            for proposal in proposals:
+                proposal["estimated_speedup"] = self._estimate(
+                    conn, proposal["table"], proposal["columns"][:proposal["equality_columns"]], proposal["range"]
+                )
+        if measure:
+            measure_indexes(self.path, proposals, repeat)
+        return {"observed_queries": self.observed, "unindexable_scans": self.unindexable_scans, "proposals": proposals}
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = connect(self.path, readonly=True)
+        version = self._conn.execute("PRAGMA schema_version").fetchone()[0]
+        if self._schema is not None and self._schema.version != version:
+            # EXPLAIN never checks the schema cookie, so plans would keep ignoring new indexes on this connection
+            self._conn.close()
+            self._conn = connect(self.path, readonly=True)
+            self._schema = None
+        if self._schema is None:
+            self._schema = read_schema(self._conn)
+            self._plans.clear()
+        return self._conn
+
+    def _analyze(self, sql: str) -> list[tuple[str, tuple[str, ...], int, bool]]:
+        conn = self._connection()
+        try:
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        except sqlite3.Error:
+            return []
+        tables = self._schema.tables
+        text = _STRING.sub("?", sql)
+        aliases = {}
+        for table, alias in _SOURCE.findall(text):
+            if table in tables:
+                aliases[table.lower()] = table
+                if alias:
+                    aliases[alias.lower()] = table
+        involved = set(aliases.values())
+        loops = [row for row in plan if row[3].startswith(("SCAN ", "SEARCH "))]
+        candidates = []
+        for position, row in enumerate(loops):
+            match = _SCAN.match(row[3])
+            if not match:
+                continue
+            table = aliases.get((match.group(2) or match.group(1)).lower()) or aliases.get(match.group(1).lower())
+            if table is None:
+                continue
+            # Join columns only help when the table is an inner loop; the outer loop reads every row anyway
+            candidate = _index_columns(text, table, aliases, involved, tables, joins=position > 0)
+            if candidate:
+                candidates.append((table, *candidate))
+            else:
+                self.unindexable_scans += 1
+        return candidates
+
+    def _estimate(self, conn, table: str, equality: list[str], ranged: bool):
+        # Ratio of rows read without and with the index, assuming uniformly distributed values; an upper
+        # bound on the speedup since it ignores per-query fixed costs
+        rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        if not rows:
+            return None
+        matched = float(rows)
+        for column in equality:
+            distinct = conn.execute(f'SELECT COUNT(DISTINCT "{column}") FROM "{table}"').fetchone()[0] or 1
+            matched /= distinct
+        if ranged:
+            matched *= RANGE_SELECTIVITY
+        if matched >= rows:
+            return None
+        return round(rows / max(matched, 1.0), 1)
+
+    def _create(self, table: str, columns: tuple[str, ...]):
+        # The app database takes DDL through the write queue like any other write
+        from db.write_queue import execute_write
+        statement = index_statement(table, columns)
+        try:
+            if self.path == DB_PATH:
+                execute_write(statement)
+            else:
+                conn = connect(self.path)
+                conn.execute(statement)
+                conn.close()
+        except sqlite3.Error:
+            with self._lock:
+                self._created.discard((table, columns))
+
+
+def _index_name(table: str, columns) -> str:
+    return f"idx_{table}_{'_'.join(columns)}"
+
+
+def index_statement(table: str, columns) -> str:
+    return f'CREATE INDEX IF NOT EXISTS "{_index_name(table, columns)}" ON "{table}" ({", ".join(columns)})'
+
+
+def _references(text: str, table: str, aliases: dict, involved: set, tables: dict):
+    # Yields (column, operator, other side is a column) for comparisons on `table`
+    for qualifier, column, operator, right, right_qualifier, right_column in _COMPARISON.findall(text):
+        operator = operator.upper()
+        sides = [(qualifier, column, right_qualifier, right_column)]
+        if right_column and not right.lstrip().startswith("("):
+            sides.append((right_qualifier, right_column, qualifier, column))
+        for own_qualifier, own_column, other_qualifier, other_column in sides:
+            owner = _owner(own_qualifier, own_column, aliases, involved, tables)
+            if owner != table:
+                continue
+            other = _owner(other_qualifier, other_column, aliases, involved, tables) if other_column else None
+            yield own_column, operator, other is not None and other_column in tables.get(other, [])
+
+
+def _owner(qualifier: str, column: str, aliases: dict, involved: set, tables: dict) -> str | None:
+    if qualifier:
+        return aliases.get(qualifier.lower())
+    owners = [table for table in involved if column in tables[table]]
+    return owners[0] if len(owners) == 1 else None
+
+
+def _index_columns(text: str, table: str, aliases: dict, involved: set, tables: dict, joins: bool):
+    # Equality columns first, then one range column (or the ORDER BY column), then the remaining read
+    # columns of the table if that keeps the index covering within INDEX_ADVISOR_MAX_COLUMNS.
+    # Returns (columns, number of leading equality columns, whether a range column follows)
+    equality, ranges = [], []
+    for column, operator, is_join in _references(text, table, aliases, involved, tables):
+        if is_join and not joins:
+            continue
+        target = equality if operator in _EQUALITY else ranges
+        if column not in target:
+            target.append(column)
+    if not equality and not ranges:
+        return None
+    ranges = [column for column in ranges if column not in equality][:1]
+    columns = equality + ranges
+    order_by = _ORDER_BY.search(text)
+    if order_by and len(columns) == len(equality):
+        for term in order_by.group(1).split(","):
+            match = re.match(rf"\s*{_OPERAND}", term)
+            if match and _owner(match.group(1), match.group(2), aliases, involved, tables) == table and match.group(2) not in columns:
+                columns.append(match.group(2))
+                break
+    columns = columns[:INDEX_ADVISOR_MAX_COLUMNS]
+    leading = min(len(equality), len(columns))
+    ranged = bool(ranges) and len(columns) > leading
+    used = [column for column in tables[table] if re.search(rf"\b{column}\b", text) and column not in columns and column != "id"]
+    if len(columns) + len(used) <= INDEX_ADVISOR_MAX_COLUMNS:
+        columns += used
+    return tuple(columns), leading, ranged
+
+
+def _timed(conn, sql: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        # Same time and step budget as a live READ, so a bad example can't run for minutes
+        with guarded(conn, "read"):
+            conn.execute(sql).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def measure_indexes(path: str, proposals: list[dict], repeat: int = 5):
+    # Adds "measured" to each proposal. One throwaway copy of the database serves the whole report: each
+    # index is built, timed against the proposal's examples and dropped again before the next one
+    with tempfile.TemporaryDirectory(prefix="index-advisor-") as workdir:
+        target = sqlite3.connect(os.path.join(workdir, "copy.db"))
+        source = connect(path, readonly=True)
+        source.backup(target)
+        source.close()
+        for proposal in proposals:
+            try:
+                proposal["measured"] = _measure(target, proposal["statement"], proposal["examples"], repeat)
+            except BudgetExceeded as e:
+                proposal["measured"] = {"error": str(e)}
+            finally:
+                target.execute(f'DROP INDEX IF EXISTS "{_index_name(proposal["table"], proposal["columns"])}"')
+        target.close()
+
+
+def _measure(conn, statement: str, examples: list[str], repeat: int) -> dict:
+    before_ms = sum(_timed(conn, sql, repeat) for sql in examples)
+    started = time.perf_counter()
+    conn.execute(statement)
+    build_ms = (time.perf_counter() - started) * 1000
+    after_ms = sum(_timed(conn, sql, repeat) for sql in examples)
+    return {
+        "before_ms": round(before_ms, 3),
+        "after_ms": round(after_ms, 3),
+        "speedup": round(before_ms / after_ms, 1) if after_ms else None,
+        "build_ms": round(build_ms, 3),
+    }
+
+
+index_advisor = IndexAdvisor()
@@ -0,0 +1,73 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from db.connection import get_pool
+from db.guardrails import check_rows, guarded, row_limit
+
+READ_PAGE_SIZE = int(os.getenv("READ_PAGE_SIZE", "200"))
+READ_FETCH_BATCH = int(os.getenv("READ_FETCH_BATCH", "100"))
+CURSOR_TTL_SECONDS = int(os.getenv("CURSOR_TTL_SECONDS", "3600"))
+# Set CURSOR_SECRET to the same value on every replica so tokens survive restarts and load balancing
+_CURSOR_SECRET = os.getenv("CURSOR_SECRET", "").encode() or secrets.token_bytes(32)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def encode_cursor(sql: str, offset: int) -> str:
+    # Signed rather than stored: the token can only ever point at SQL this server validated
+    payload = _b64encode(json.dumps({"sql": sql, "offset": offset, "exp": int(time.time()) + CURSOR_TTL_SECONDS}).encode())
+    signature = _b64encode(hmac.new(_CURSOR_SECRET, payload.encode(), hashlib.sha256).digest())
+    return f"{payload}.{signature}"
+
+
+def decode_cursor(token: str) -> tuple[str, int]:
+    try:
+        payload, signature = token.split(".", 1)
+        expected = _b64encode(hmac.new(_CURSOR_SECRET, payload.encode(), hashlib.sha256).digest())
+        if not hmac.compare_digest(signature, expected):
+            raise InvalidCursor("cursor signature does not match")
+        data = json.loads(_b64decode(payload))
+    except (ValueError, json.JSONDecodeError) as e:
+        if isinstance(e, InvalidCursor):
+            raise
+        raise InvalidCursor("malformed cursor") from e
+    if data.get("exp", 0) < time.time():
+        raise InvalidCursor("cursor has expired")
+    return data["sql"], int(data["offset"])
+
+
+def fetch_rows(cursor, limit: int) -> tuple[list, bool]:
+    # Streams at most limit rows in batches and peeks one row further to learn whether more exist
+    rows = []
+    while len(rows) <= limit:
+        batch = cursor.fetchmany(min(READ_FETCH_BATCH, limit + 1 - len(rows)))
+        if not batch:
+            break
+        rows.extend(batch)
+    has_more = len(rows) > limit
+    return rows[:limit], has_more
+
+
+def fetch_page(sql: str, offset: int, page_size: int = READ_PAGE_SIZE) -> tuple[list, list[str], bool]:
+    with get_pool().connection() as conn, guarded(conn, "read"):
+        c = conn.cursor()
+        # The inner SQL on its own lines, so a trailing -- comment can't swallow the closing parenthesis
+        c.execute(f"SELECT * FROM (\n{sql}\n) LIMIT -1 OFFSET ?", (offset,))
+        rows, has_more = fetch_rows(c, row_limit("read", offset, page_size))
+        check_rows("read", offset, len(rows), has_more)
+        columns = [column[0] for column in c.description or []]
+    return rows, columns, has_more
@@ -0,0 +1,159 @@
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from core.metrics import record_cache_hit
+from db.connection import DB_PATH, connect
+from db.sql_validator import clean_sql, validate_sql
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE", "1") == "1"
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+_SQL_PARTS = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|\s+")
+
+
+def normalize_sql(sql) -> str:
+    # Whitespace outside literals doesn't change a statement, so it doesn't split cache entries either
+    return _SQL_PARTS.sub(lambda match: match.group(1) or " ", clean_sql(sql)).strip()
+
+
+def _result_size(columns, rows) -> int:
+    size = sys.getsizeof(rows) + sum(sys.getsizeof(column) for column in columns)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+class ResultCache:
+    # READ results keyed by normalized SQL; an entry is dropped when a write commits to any table it read
+    def __init__(self, path: str = DB_PATH, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+        self._data_version = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.external_invalidations = 0
+        self.evictions = 0
+
+    def generation(self) -> int:
+        # Taken before a read executes; put() ignores the rows if a write was committed in between
+        return self._generation
+
+    def get(self, sql):
+        if not RESULT_CACHE_ENABLED:
+            return None
+        key = normalize_sql(sql)
+        with self._lock:
+            self._check_external_writes()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            record_cache_hit("result")
+            return entry["columns"], list(entry["rows"]), entry["has_more"]
+
+    def put(self, sql, columns, rows, has_more: bool, generation: int) -> bool:
+        if not RESULT_CACHE_ENABLED:
+            return False
+        checked = validate_sql(sql, "read")
+        if not checked.ok or not checked.tables:
+            return False
+        key = normalize_sql(sql)
+        size = _result_size(columns, rows)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if generation != self._generation:
+                return False
+            self._discard(key)
+            self._entries[key] = {"columns": list(columns), "rows": list(rows), "has_more": has_more, "tables": checked.tables, "size": size}
+            for table in checked.tables:
+                self._by_table.setdefault(table, set()).add(key)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def invalidate_tables(self, tables):
+        with self._lock:
+            self._generation += 1
+            for table in tables:
+                for key in list(self._by_table.get(table, ())):
+                    self._discard(key)
+                    self.invalidations += 1
+            # Our own commit also moves data_version; re-read it so only writes from other processes clear everything.
+            # A foreign commit landing between our commit and this read goes unnoticed until the next one.
+            self._data_version = self._read_data_version()
+
+    def invalidate_for_write(self, sql, intent: str):
+        # Every table the statement touches, including ones it only reads and those written by triggers
+        checked = validate_sql(sql, intent)
+        if checked.tables:
+            self.invalidate_tables(checked.tables)
+        else:
+            self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "external_invalidations": self.external_invalidations,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry["size"]
+        for table in entry["tables"]:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def _read_data_version(self) -> int:
+        # A connection that never writes sees data_version change on every commit made through any other connection
+        if self._watcher is None or self._watcher_pid != os.getpid():
+            self._watcher = connect(self.path, readonly=True)
+            self._watcher_pid = os.getpid()
+        return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_external_writes(self):
+        version = self._read_data_version()
+        if self._data_version is not None and version != self._data_version:
+            if self._entries:
+                self.external_invalidations += 1
+            self._generation += 1
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+        self._data_version = version
+
+
+result_cache = ResultCache()
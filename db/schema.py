@@ -0,0 +1,126 @@
+import hashlib
+import re
+import sqlite3
+import threading
+from db.connection import get_pool
+
+_TABLE_CONSTRAINT = re.compile(r"^(CONSTRAINT|PRIMARY\s+KEY|UNIQUE|CHECK|FOREIGN\s+KEY)\b", re.IGNORECASE)
+_FOREIGN_KEY_COLUMNS = re.compile(r"^FOREIGN\s+KEY\s*\(([^)]*)\)", re.IGNORECASE)
+
+
+def _split_definitions(ddl: str) -> list[str]:
+    # Top-level comma split of the CREATE TABLE body; commas inside parentheses or quotes don't count
+    body = ddl[ddl.index("(") + 1:ddl.rindex(")")]
+    parts, current, depth, quote = [], [], 0, None
+    for char in body:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"`[":
+            quote = "]" if char == "[" else char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return [" ".join(part.split()) for part in parts if part.strip()]
+
+
+class SchemaSnapshot:
+    # Introspected schema of the live database plus a schema-only in-memory copy used to prepare statements
+    def __init__(self, version: int, ddl: list[str], tables: dict[str, list[str]], definitions: dict[str, dict[str, str]] = None,
+                 constraints: dict[str, list[str]] = None, primary_keys: dict[str, list[str]] = None,
+                 foreign_keys: dict[str, list[tuple[str, str, str]]] = None):
+        self.version = version
+        self.ddl = ddl
+        self.tables = tables
+        self.definitions = definitions or {}
+        self.constraints = constraints or {}
+        self.primary_keys = primary_keys or {}
+        # table -> [(column, referenced table, referenced column)]
+        self.foreign_keys = foreign_keys or {}
+        # Content hash of the DDL: the same schema hashes the same in every process and database file
+        self.digest = hashlib.sha256("\n".join(ddl).encode()).hexdigest()[:16]
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def explain(self, sql: str, authorizer=None):
+        # EXPLAIN compiles the statement without running it; the in-memory copy has no rows anyway
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+                for statement in self.ddl:
+                    self._conn.execute(statement)
+            self._conn.set_authorizer(authorizer)
+            try:
+                self._conn.execute(f"EXPLAIN {sql}")
+            finally:
+                self._conn.set_authorizer(None)
+
+    def neighbours(self, table: str) -> set[str]:
+        # Tables one foreign key away in either direction
+        related = {referenced for _, referenced, _ in self.foreign_keys.get(table, [])}
+        related.update(other for other, keys in self.foreign_keys.items() if any(referenced == table for _, referenced, _ in keys))
+        return related & set(self.tables)
+
+    def describe(self, tables=None, columns: dict[str, set[str]] = None) -> str:
+        # Prompt form, one line per table: users(id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, ...)
+        lines = []
+        for table, names in self.tables.items():
+            if tables is not None and table not in tables:
+                continue
+            keep = (columns or {}).get(table)
+            definitions = self.definitions.get(table, {})
+            parts = [definitions.get(name, name) for name in names if keep is None or name in keep]
+            for constraint in self.constraints.get(table, []):
+                foreign = _FOREIGN_KEY_COLUMNS.match(constraint)
+                if keep is None or (foreign and all(name.strip(' "`[]') in keep for name in foreign.group(1).split(","))):
+                    parts.append(constraint)
+            lines.append(f"{table}({', '.join(parts)})")
+        return "\n".join(lines)
+
+
+def read_schema(conn: sqlite3.Connection) -> SchemaSnapshot:
+    version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    rows = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'view' THEN 1 ELSE 2 END"
+    ).fetchall()
+    ddl = [sql for _, _, sql in rows]
+    tables, definitions, constraints, primary_keys, foreign_keys = {}, {}, {}, {}, {}
+    for kind, name, sql in rows:
+        if kind not in ("table", "view"):
+            continue
+        info = conn.execute(f'PRAGMA table_info("{name}")').fetchall()
+        tables[name] = [column[1] for column in info]
+        primary_keys[name] = [column[1] for column in info if column[5]]
+        foreign_keys[name] = [(row[3], row[2], row[4]) for row in conn.execute(f'PRAGMA foreign_key_list("{name}")')]
+        if kind == "table":
+            definitions[name], constraints[name] = {}, []
+            for part in _split_definitions(sql):
+                if _TABLE_CONSTRAINT.match(part):
+                    constraints[name].append(part)
+                else:
+                    definitions[name][part.split()[0].strip('"`[]')] = part
+    return SchemaSnapshot(version, ddl, tables, definitions, constraints, primary_keys, foreign_keys)
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+def get_schema() -> SchemaSnapshot:
+    # Re-introspects only when PRAGMA schema_version moves, i.e. after DDL
+    global _snapshot
+    with get_pool().connection() as conn:
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        if _snapshot is not None and _snapshot.version == version:
+            return _snapshot
+        with _snapshot_lock:
+            if _snapshot is None or _snapshot.version != version:
+                _snapshot = read_schema(conn)
+        return _snapshot
@@ -0,0 +1,101 @@
+import os
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from db.schema import get_schema
+
+LOCAL_SQL_VALIDATION_ENABLED = os.getenv("LOCAL_SQL_VALIDATION", "1") == "1"
+
+_FENCED_BLOCK = re.compile(r"```[ \t]*([A-Za-z0-9_-]*)[ \t]*\n?(.*?)```", re.DOTALL)
+_LEADING_LABEL = re.compile(r"^\s*(validated and \(if needed\) corrected sql query|validated and corrected sql query|sql query|sql|query)\s*:\s*", re.IGNORECASE)
+
+_COMMON_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+# Which authorizer actions each intent may compile; anything else (PRAGMA, ATTACH, DDL, other writes) is a problem
+ALLOWED_ACTIONS = {
+    "read": _COMMON_ACTIONS,
+    "create": _COMMON_ACTIONS | {sqlite3.SQLITE_INSERT},
+    "update": _COMMON_ACTIONS | {sqlite3.SQLITE_UPDATE},
+    "delete": _COMMON_ACTIONS | {sqlite3.SQLITE_DELETE},
+}
+REQUIRED_ACTION = {
+    "read": sqlite3.SQLITE_SELECT,
+    "create": sqlite3.SQLITE_INSERT,
+    "update": sqlite3.SQLITE_UPDATE,
+    "delete": sqlite3.SQLITE_DELETE,
+}
+_ACTION_NAMES = {
+    getattr(sqlite3, f"SQLITE_{name}"): name
+    for name in (
+        "CREATE_INDEX", "CREATE_TABLE", "CREATE_TEMP_INDEX", "CREATE_TEMP_TABLE", "CREATE_TEMP_TRIGGER",
+        "CREATE_TEMP_VIEW", "CREATE_TRIGGER", "CREATE_VIEW", "DELETE", "DROP_INDEX", "DROP_TABLE",
+        "DROP_TEMP_INDEX", "DROP_TEMP_TABLE", "DROP_TEMP_TRIGGER", "DROP_TEMP_VIEW", "DROP_TRIGGER",
+        "DROP_VIEW", "INSERT", "PRAGMA", "READ", "SELECT", "TRANSACTION", "UPDATE", "ATTACH", "DETACH",
+        "ALTER_TABLE", "REINDEX", "ANALYZE", "CREATE_VTABLE", "DROP_VTABLE", "FUNCTION", "SAVEPOINT", "RECURSIVE",
+    )
+}
+
+
+@dataclass
+class ValidationResult:
+    sql: str
+    errors: list[str] = field(default_factory=list)
+    tables: set[str] = field(default_factory=set)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def clean_sql(text) -> str:
+    # Handles fences anywhere in the reply (```sql, ```SQLite, bare ```), "SQL Query:" labels, quotes and trailing ;
+    if text is None:
+        return ""
+    if hasattr(text, "content"):
+        text = text.content
+    sql = str(text).strip()
+    fenced = _FENCED_BLOCK.search(sql)
+    if fenced:
+        sql = fenced.group(2)
+    else:
+        sql = sql.replace("```", "")
+    sql = _LEADING_LABEL.sub("", sql.strip()).strip()
+    if len(sql) >= 2 and sql[0] == sql[-1] and sql[0] in "\"'`" and sql.count(sql[0]) == 2:
+        sql = sql[1:-1].strip()
+    return sql.rstrip(";").strip()
+
+
+def validate_sql(text, intent: str) -> ValidationResult:
+    sql = clean_sql(text)
+    result = ValidationResult(sql=sql)
+    if not sql:
+        result.errors.append("empty query")
+        return result
+    schema = get_schema()
+    allowed = ALLOWED_ACTIONS.get(intent, set())
+    seen_actions = set()
+
+    def authorizer(action, arg1, arg2, db_name, source):
+        seen_actions.add(action)
+        if action in (sqlite3.SQLITE_READ, sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE) and arg1:
+            if arg1 in schema.tables:
+                result.tables.add(arg1)
+            if arg2 and arg1 in schema.tables and arg2 not in schema.tables[arg1] and arg2 != "ROWID":
+                result.errors.append(f"unknown column {arg1}.{arg2}")
+        if action not in allowed:
+            result.errors.append(f"{_ACTION_NAMES.get(action, action)} is not allowed for a {intent} request")
+            return sqlite3.SQLITE_DENY
+        return sqlite3.SQLITE_OK
+
+    try:
+        schema.explain(sql, authorizer)
+    except sqlite3.DatabaseError as e:
+        if not result.errors:
+            result.errors.append(str(e))
+    except sqlite3.ProgrammingError as e:
+        # e.g. more than one statement
+        result.errors.append(str(e))
+    except sqlite3.Warning as e:
+        result.errors.append(str(e))
+    if not result.errors and REQUIRED_ACTION.get(intent) not in seen_actions:
+        result.errors.append(f"expected a {_ACTION_NAMES.get(REQUIRED_ACTION.get(intent))} statement for a {intent} request")
+    return result
@@ -0,0 +1,162 @@
+import os
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+
+# Rows added per unit of --scale; scale 10 gives 100k users, 10k products and 1M orders
+USERS_PER_SCALE = 10_000
+PRODUCTS_PER_SCALE = 1_000
+ORDERS_PER_SCALE = 100_000
+BATCH_SIZE = 50_000
+HISTORY_DAYS = 730
+# Exponents of the power-law skew: orders favour early (long-standing) users and a head of popular products
+USER_SKEW = 2.0
+PRODUCT_SKEW = 3.0
+
+FIRST_NAMES = ["Sarah", "Michael", "Emily", "James", "Priya", "David", "Maria", "Robert", "Jessica", "Ahmed",
+               "Lisa", "Chris", "Wei", "Fatima", "Lucas", "Olivia", "Noah", "Aisha", "Mateo", "Hannah"]
+LAST_NAMES = ["Johnson", "Chen", "Rodriguez", "Wilson", "Patel", "Thompson", "Garcia", "Kim", "Brown", "Hassan",
+              "Anderson", "Martinez", "Nguyen", "Khan", "Silva", "Miller", "Okafor", "Rossi", "Cohen", "Singh"]
+DOMAINS = ["gmail.com", "outlook.com", "yahoo.com", "company.com", "tech.io", "university.edu"]
+CATEGORIES = ["Electronics", "Home & Kitchen", "Books", "Clothing", "Sports & Outdoors", "Office Supplies"]
+CATEGORY_WEIGHTS = [25, 20, 20, 15, 12, 8]
+PRODUCT_WORDS = ["Pro", "Max", "Lite", "Classic", "Premium", "Mini", "Plus", "Essential", "Ultra", "Air"]
+QUANTITY_WEIGHTS = [60, 20, 10, 6, 4]
+
+
+def stage_database(path: str) -> str:
+    # The load goes to a new file next to path; a leftover from a crashed load is discarded first
+    staging = f"{path}.loading"
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        if os.path.exists(staging + suffix):
+            os.remove(staging + suffix)
+    return staging
+
+
+def replace_database(staging: str, path: str):
+    # Moves a finished load over path. The live file leaves WAL mode first, so no -wal file of the old
+    # database is left behind to be replayed into the new one; this fails while a server has it open
+    if os.path.exists(path):
+        live = sqlite3.connect(path)
+        try:
+            live.execute("PRAGMA journal_mode=DELETE")
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(f"{path} is in use ({e}); stop the server and run the load again") from e
+        finally:
+            live.close()
+    os.replace(staging, path)
+
+
+@contextmanager
+def load_pragmas(conn):
+    # Only for a staging file from stage_database: a crash mid-load can leave it corrupt, but never the live
+    # database, so durability is traded for speed until the load finishes
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-262144")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+    try:
+        yield
+    finally:
+        conn.execute("PRAGMA locking_mode=NORMAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+
+
+def _users(rng: random.Random, start_id: int, count: int, now: datetime):
+    for i in range(count):
+        number = start_id + i
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        # Ids follow sign-up order
+        created = now - timedelta(days=HISTORY_DAYS * (1 - i / count), seconds=rng.randint(0, 86399))
+        yield (
+            f"{first} {last}",
+            f"{first.lower()}.{last.lower()}{number}@{rng.choice(DOMAINS)}",
+            int(rng.random() < 0.85),
+            created.isoformat(),
+        )
+
+
+def _products(rng: random.Random, count: int):
+    categories = rng.choices(CATEGORIES, weights=CATEGORY_WEIGHTS, k=count)
+    for i, category in enumerate(categories):
+        yield (
+            f"{category.split()[0]} {rng.choice(PRODUCT_WORDS)} {i + 1}",
+            category,
+            round(min(rng.lognormvariate(4.0, 1.0), 5000.0), 2),
+            rng.randint(0, 500),
+        )
+
+
+def _status(rng: random.Random, age_days: float) -> str:
+    if age_days < 2:
+        return rng.choice(["Pending", "Processing"])
+    if age_days < 7:
+        return rng.choice(["Processing", "Shipped", "Shipped"])
+    roll = rng.random()
+    return "Delivered" if roll < 0.9 else "Cancelled" if roll < 0.96 else "Returned"
+
+
+def _orders(rng: random.Random, count: int, users: int, products: int, now: datetime):
+    # Hot loop: the draws are inlined and quantity comes from a 100-slot lookup table instead of rng.choices
+    quantities = [quantity for quantity, weight in enumerate(QUANTITY_WEIGHTS, 1) for _ in range(weight)]
+    draw = rng.random
+    epoch = now.timestamp()
+    for i in range(count):
+        # Order volume grows over time (density ∝ t), and ids follow order date
+        age_days = HISTORY_DAYS * (1 - ((i + draw()) / count) ** 0.5)
+        # Ids are inverse-CDF power-law draws, so no per-id weight table is needed
+        yield (
+            int(users * draw() ** USER_SKEW) + 1,
+            int(products * draw() ** PRODUCT_SKEW) + 1,
+            quantities[int(draw() * len(quantities))],
+            _status(rng, age_days),
+            datetime.fromtimestamp(epoch - age_days * 86400).isoformat(),
+        )
+
+
+def _insert(conn, sql: str, rows, batch_size: int) -> tuple[int, float]:
+    started = time.perf_counter()
+    total = 0
+    with conn:
+        while batch := list(islice(rows, batch_size)):
+            conn.executemany(sql, batch)
+            total += len(batch)
+    return total, time.perf_counter() - started
+
+
+def _throughput(rows: int, seconds: float) -> dict:
+    return {"rows": rows, "seconds": round(seconds, 3), "rows_per_s": round(rows / seconds) if seconds else None}
+
+
+def bulk_load(conn, scale: float, seed: int = 42, batch_size: int = BATCH_SIZE) -> dict:
+    # Appends scale * *_PER_SCALE rows to each table, one transaction per table, and reports rows/sec.
+    # conn must be on a staging file (see stage_database), never on the live database
+    rng = random.Random(seed)
+    now = datetime.now()
+    report = {}
+    with load_pragmas(conn):
+        first_user = conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0] + 1
+        report["users"] = _throughput(*_insert(
+            conn, "INSERT INTO users (name, email, is_active, created_at) VALUES (?, ?, ?, ?)",
+            _users(rng, first_user, int(scale * USERS_PER_SCALE), now), batch_size,
+        ))
+        report["products"] = _throughput(*_insert(
+            conn, "INSERT INTO products (name, category, price, stock) VALUES (?, ?, ?, ?)",
+            _products(rng, int(scale * PRODUCTS_PER_SCALE)), batch_size,
+        ))
+        # Orders reference every user and product, including the seeded sample rows
+        users = conn.execute("SELECT MAX(id) FROM users").fetchone()[0]
+        products = conn.execute("SELECT MAX(id) FROM products").fetchone()[0]
+        report["orders"] = _throughput(*_insert(
+            conn, "INSERT INTO orders (user_id, product_id, quantity, order_status, order_date) VALUES (?, ?, ?, ?, ?)",
+            _orders(rng, int(scale * ORDERS_PER_SCALE), users, products, now), batch_size,
+        ))
+    report["total"] = _throughput(
+        sum(entry["rows"] for entry in report.values()), sum(entry["seconds"] for entry in report.values())
+    )
+    return report
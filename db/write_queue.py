@@ -0,0 +1,187 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from core.metrics import WRITE_BATCH_SIZE, record_sqlite_time
+from db.connection import DB_BUSY_TIMEOUT, DB_PATH, ConnectionPool, connect
+from db.guardrails import check_affected, guarded, timeout_seconds
+
+WRITE_QUEUE_ENABLED = os.getenv("WRITE_QUEUE", "1") == "1"
+# How long the writer waits for more statements after the first one before committing
+WRITE_BATCH_WINDOW_MS = float(os.getenv("WRITE_BATCH_WINDOW_MS", "2"))
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "64"))
+
+
+class WriteQueue:
+    # Single writer thread: approved statements are grouped into one transaction per window (group commit),
+    # each inside its own savepoint so a failing statement only rolls back itself
+    def __init__(self, path: str = DB_PATH, window_ms: float = WRITE_BATCH_WINDOW_MS, max_batch: int = WRITE_BATCH_MAX):
+        self.path = path
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopped = None
+        self._thread = None
+        self.start()
+
+    def start(self):
+        # The connection is opened here rather than in the thread, so a bad path or a locked file raises to the caller
+        conn = connect(self.path)
+        conn.isolation_level = None  # explicit BEGIN/SAVEPOINT/COMMIT below
+        self._thread = threading.Thread(target=self._run, args=(conn,), name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def alive(self) -> bool:
+        return self._stopped is None and self._thread.is_alive()
+
+    def execute(self, sql: str, intent: str | None = None) -> int:
+        # Blocks until the batch holding this statement has committed; returns its affected-row count
+        # or raises the statement's own error. intent selects the execution budget (db/guardrails.py)
+        future = Future()
+        with self._lock:
+            # Checked under the lock the dying writer takes, so no statement is queued after its last drain
+            if self._stopped is not None:
+                raise RuntimeError("The SQLite writer thread has stopped") from self._stopped
+            self._queue.put((sql, intent, future))
+        started = time.perf_counter()
+        try:
+            return self._wait(future, intent)
+        finally:
+            record_sqlite_time(time.perf_counter() - started)
+
+    def _wait(self, future: Future, intent: str | None) -> int:
+        # Bounded by the statement's time budget, plus the batch window and the wait for the write lock
+        budget = timeout_seconds(intent) if intent else None
+        if budget is None:
+            return future.result()
+        try:
+            return future.result(timeout=budget + self.window + DB_BUSY_TIMEOUT)
+        except TimeoutError:
+            if future.cancel():
+                # Still queued, and the writer skips cancelled statements, so nothing was written
+                raise TimeoutError(f"The write was not started within {budget + self.window + DB_BUSY_TIMEOUT:.1f} s; nothing was changed")
+        # Already running: its own time budget ends it
+        return future.result(timeout=budget)
+
+    def _run(self, conn):
+        batch = []
+        try:
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.window
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                    except queue.Empty:
+                        break
+                # Marks each statement as started, so a waiter that timed out can no longer cancel it
+                batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+                self._commit(conn, batch)
+        except BaseException as e:
+            self._stop(e, batch)
+            raise
+        finally:
+            conn.close()
+
+    def _stop(self, cause: BaseException, batch: list):
+        # Fails the batch in flight, everything still queued and, through execute, everything queued later
+        error = RuntimeError("The SQLite writer thread has stopped")
+        error.__cause__ = cause
+        with self._lock:
+            self._stopped = cause
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+        while True:
+            try:
+                _, _, future = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    def _commit(self, conn, batch: list[tuple[str, str | None, Future]]):
+        # An interrupted statement takes the whole transaction with it; the others are retried in a new one
+        while batch:
+            batch = self._commit_batch(conn, batch)
+
+    def _commit_batch(self, conn, batch: list[tuple[str, str | None, Future]]) -> list:
+        # Returns the statements to retry, or [] once every future is settled
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for index, (sql, intent, future) in enumerate(batch):
+                conn.execute("SAVEPOINT statement")
+                try:
+                    with guarded(conn, intent):
+                        cursor = conn.execute(sql)
+                    # Over the affected-rows budget: rolled back to the savepoint like any failing statement
+                    check_affected(intent, cursor.rowcount)
+                    outcomes.append((cursor.rowcount, None))
+                    conn.execute("RELEASE statement")
+                except Exception as e:
+                    if not conn.in_transaction:
+                        # A time or step budget interrupt rolls back the whole transaction, savepoints included,
+                        # so the statements released before it are gone too
+                        future.set_exception(e)
+                        return batch[:index] + batch[index + 1:]
+                    conn.execute("ROLLBACK TO statement")
+                    conn.execute("RELEASE statement")
+                    outcomes.append((None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # BEGIN or COMMIT failed: nothing in this batch was written
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, _, future in batch:
+                future.set_exception(e)
+            return []
+        WRITE_BATCH_SIZE.observe(len(batch))
+        for (_, _, future), (rowcount, error) in zip(batch, outcomes):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(rowcount)
+        return []
+
+_queue = None
+_queue_pid = None
+_queue_lock = threading.Lock()
+_writer = None
+_writer_pid = None
+
+def get_write_queue() -> WriteQueue:
+    # One writer per process, started on first use and replaced if its thread has died
+    global _queue, _queue_pid
+    if _queue is None or _queue_pid != os.getpid() or not _queue.alive():
+        with _queue_lock:
+            if _queue is None or _queue_pid != os.getpid() or not _queue.alive():
+                _queue = WriteQueue()
+                _queue_pid = os.getpid()
+    return _queue
+
+
+def get_writer() -> ConnectionPool:
+    # Without the queue: one read-write connection per process, so writes are still serialized, one commit each
+    global _writer, _writer_pid
+    if _writer is None or _writer_pid != os.getpid():
+        with _queue_lock:
+            if _writer is None or _writer_pid != os.getpid():
+                _writer = ConnectionPool(size=1, readonly=False)
+                _writer_pid = os.getpid()
+    return _writer
+
+
+def execute_write(sql: str, intent: str | None = None) -> int:
+    if WRITE_QUEUE_ENABLED:
+        return get_write_queue().execute(sql, intent)
+    with get_writer().connection() as conn:
+        with guarded(conn, intent):
+            cursor = conn.execute(sql)
+        affected = cursor.rowcount
+        # Raising here leaves the transaction open, and the pool rolls it back
+        check_affected(intent, affected)
+        conn.commit()
+    return affected
@@ -1,13 +1,79 @@
-from fastapi import FastAPI
+import time
+_import_started = time.perf_counter()
+import asyncio
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from langgraph.types import Command
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
 from typing import Optional
-from agents.graph import AgenticCRUDApp
+from agents.graph import AgenticCRUDApp, ApprovalConflict, ANSWER_NODES, EXECUTE_NODES
+from core.llm import prewarm_models
+from core.metrics import COALESCED_REQUESTS, REQUEST_SECONDS, STARTUP_SECONDS, request_timings, timing_breakdown, track_request
+from core.prompts import build_prompts
+from core.singleflight import SingleFlight, coalesce_key
+from db.checkpoints import CHECKPOINT_SWEEP_SECONDS, async_sqlite_checkpointer, asweep_threads
+from db.connection import get_pool
+from db.executor import run_in_db_executor
+from db.guardrails import BudgetExceeded
+from db.index_advisor import INDEX_ADVISOR_MEASURE, index_advisor
+from db.schema import get_schema
+from db.pagination import READ_PAGE_SIZE, InvalidCursor, decode_cursor, encode_cursor, fetch_page
+from db.sql_validator import validate_sql
+
+crud_agent = None
+read_flight = SingleFlight()
+# One index measurement at a time; each copies the whole database
+measure_lock = asyncio.Lock()
+
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+# Upper bound on graph runs in flight per batch, i.e. concurrent LLM calls and DB work
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+# Build LLM clients, prompt templates and pooled connections before serving instead of on first use.
+# Startup takes longer (the provider SDK imports move into it), the first requests don't
+STARTUP_PREWARM = os.getenv("STARTUP_PREWARM", "0") == "1"
+
+def prewarm():
+    get_pool().prewarm()
+    prewarm_models()
+    build_prompts()
+
+async def sweep_checkpoints(checkpointer):
+    # Approvals that never came, and runs of crashed workers, are deleted after CHECKPOINT_TTL_SECONDS
+    while True:
+        await asweep_threads(checkpointer)
+        await asyncio.sleep(CHECKPOINT_SWEEP_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The async checkpointer binds to the running loop, so the graph is compiled here rather than at import
+    global crud_agent
+    started = time.perf_counter()
+    # Introspect the schema once up front; later requests only re-read it after DDL
+    await run_in_db_executor(get_schema)
+    if STARTUP_PREWARM:
+        await run_in_db_executor(prewarm)
+    checkpointer = await async_sqlite_checkpointer()
+    crud_agent = AgenticCRUDApp(checkpointer=checkpointer)
+    sweeper = asyncio.create_task(sweep_checkpoints(checkpointer))
+    STARTUP_SECONDS.labels("lifespan").set(time.perf_counter() - started)
+    yield
+    sweeper.cancel()
+    await checkpointer.conn.close()
+
+STARTUP_SECONDS.labels("imports").set(time.perf_counter() - _import_started)
 
 app = FastAPI(
     title="Agentic CRUD API",
     description="Natural Language CRUD Operations with Human-in-the-Loop",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -20,41 +86,257 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-crud_agent = AgenticCRUDApp()
-
 class QueryRequest(BaseModel):
     input: str
     human_verified: Optional[bool] = None
+    thread_id: Optional[str] = None
+    # Adds a per-node timing and token breakdown to the response
+    timings: bool = False
 
-@app.post("/query")
-async def query(request: QueryRequest):
-    # Build initial state
-    initial_state = {
+class BatchRequest(BaseModel):
+    inputs: list[str]
+    concurrency: Optional[int] = None
+    # NDJSON, one line per input as it finishes, instead of a single ordered response
+    stream: bool = False
+
+class PageRequest(BaseModel):
+    cursor: str
+    page_size: Optional[int] = None
+
+def check_approval(request: QueryRequest):
+    # With a checkpointer, approval only resumes the run whose SQL the user saw. human_verified on a new
+    # run would execute SQL generated just now that nobody approved
+    if request.human_verified is not None and not request.thread_id and crud_agent.checkpointer is not None:
+        raise HTTPException(status_code=400, detail="human_verified needs the thread_id of the operation being approved")
+
+def build_initial_state(request: QueryRequest) -> dict:
+    return {
         "input": request.input,
         "intent": None,
         "query": None,
         "validated_query": None,
         "results": None,
+        "columns": None,
+        "next_cursor": None,
         "answer": None,
+        "formatter": None,
         "human_verified": request.human_verified,
         "verification_required": False,
         "intermediate_steps": []
     }
-    
-    result = crud_agent.app.invoke(initial_state)
-    
+
+def build_response(result: dict, thread_id: str) -> dict:
     # Check if verification is required (for CUD operations)
     if result.get("verification_required") and result.get("human_verified") is None:
         return {
             "status": "verification_required",
+            "thread_id": thread_id,
             "validated_query": result.get("validated_query"),
             "intent": result.get("intent")
         }
-    
+
     # Return final result
     return {
         "status": "completed",
         "final_answer": result.get("answer"),
         "validated_query": result.get("validated_query"),
-        "intent": result.get("intent")
-    }
\ No newline at end of file
+        "intent": result.get("intent"),
+        "formatter": result.get("formatter"),
+        "next_cursor": result.get("next_cursor")
+    }
+
+async def run_graph(request: QueryRequest) -> dict:
+    thread_id = str(uuid.uuid4())
+    result = await crud_agent.arun(build_initial_state(request), thread_id)
+    return build_response(result, thread_id)
+
+async def run_shared_graph(request: QueryRequest) -> tuple[dict, list]:
+    response = await run_graph(request)
+    return response, request_timings()
+
+async def run_new_query(request: QueryRequest) -> dict:
+    # Identical READ questions arriving while one is running wait for that run instead of starting their own
+    key = coalesce_key(request.input)
+    if key is None:
+        return await run_graph(request)
+    (response, timings), shared = await read_flight.do(key, lambda: run_shared_graph(request))
+    if shared and response.get("intent") != "read":
+        # The graph saw a write after all: never hand its result (or its thread_id) to another request
+        return await run_graph(request)
+    COALESCED_REQUESTS.labels("follower" if shared else "leader").inc()
+    if not shared:
+        return dict(response)
+    # The nodes ran in the leader's request, so a follower reports the breakdown of the run it waited for
+    return {**response, "coalesced": True, "timings": timing_breakdown(timings)} if request.timings else {**response, "coalesced": True}
+
+@app.post("/query")
+async def query(request: QueryRequest):
+    check_approval(request)
+    started = time.perf_counter()
+    with track_request() as timings:
+        # Approval of a paused CUD run: resume from its checkpoint instead of re-running the graph
+        if request.thread_id and request.human_verified is not None:
+            thread_id = request.thread_id
+            try:
+                result = await crud_agent.aresume(thread_id, request.human_verified)
+            except ApprovalConflict as e:
+                raise HTTPException(status_code=409, detail=str(e))
+            if result is None:
+                raise HTTPException(status_code=404, detail="No pending operation for this thread_id")
+            response = build_response(result, thread_id)
+        else:
+            response = await run_new_query(request)
+    REQUEST_SECONDS.labels("query", response["status"]).observe(time.perf_counter() - started)
+    if request.timings and "timings" not in response:
+        response["timings"] = timing_breakdown(timings)
+    return response
+
+@app.post("/query/batch")
+async def query_batch(request: BatchRequest):
+    # Each distinct input runs once through the graph; all inputs run concurrently up to the limit,
+    # so the batch takes about as long as its slowest item
+    if len(request.inputs) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} inputs per batch")
+    concurrency = max(1, min(request.concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+    positions = {}
+    for index, text in enumerate(request.inputs):
+        positions.setdefault(" ".join(text.split()), []).append(index)
+
+    async def run(text: str):
+        async with semaphore:
+            try:
+                return text, await run_new_query(QueryRequest(input=text))
+            except Exception as e:
+                return text, {"status": "error", "detail": str(e)}
+
+    tasks = [asyncio.create_task(run(text)) for text in positions]
+    if request.stream:
+        async def lines():
+            for finished in asyncio.as_completed(tasks):
+                text, response = await finished
+                for index in positions[text]:
+                    yield json.dumps({"index": index, **response}, default=str) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    started = time.perf_counter()
+    results = [None] * len(request.inputs)
+    for text, response in await asyncio.gather(*tasks):
+        for index in positions[text]:
+            results[index] = response
+    REQUEST_SECONDS.labels("batch", "completed").observe(time.perf_counter() - started)
+    return {"results": results, "unique_inputs": len(positions)}
+
+@app.get("/ready")
+async def ready():
+    # Readiness probe: uvicorn only serves once the startup hook has finished, so answering means ready
+    return {"status": "ready", "prewarmed": STARTUP_PREWARM}
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus exposition of the per-node histograms and counters in core/metrics.py
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/index-advisor")
+async def index_advice(measure: bool = False):
+    # Index proposals from the plans of executed READ queries; measure=true times them on a copy of the DB
+    if not measure:
+        return await run_in_db_executor(index_advisor.report)
+    if not INDEX_ADVISOR_MEASURE:
+        raise HTTPException(status_code=403, detail="Measuring is disabled; set INDEX_ADVISOR_MEASURE=1 to enable it")
+    if measure_lock.locked():
+        raise HTTPException(status_code=429, detail="A measurement is already running")
+    async with measure_lock:
+        # Its own thread rather than the DB executor, so copying and timing never hold up READ queries
+        return await asyncio.to_thread(index_advisor.report, True)
+
+@app.post("/query/page")
+async def query_page(request: PageRequest):
+    # Further rows of a READ result: runs the already validated SQL again, no LLM involved
+    try:
+        sql, offset = decode_cursor(request.cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page_size = max(1, min(request.page_size or READ_PAGE_SIZE, READ_PAGE_SIZE))
+    checked = await run_in_db_executor(validate_sql, sql, "read")
+    if not checked.ok:
+        raise HTTPException(status_code=409, detail="; ".join(checked.errors))
+    try:
+        rows, columns, has_more = await run_in_db_executor(fetch_page, sql, offset, page_size)
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except sqlite3.Error as e:
+        # The SQL was valid when signed; a schema change since then makes it fail here
+        raise HTTPException(status_code=422, detail=f"cursor query failed: {e}")
+    return {
+        "columns": columns,
+        "rows": rows,
+        "offset": offset,
+        "next_cursor": encode_cursor(sql, offset + len(rows)) if has_more else None
+    }
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def node_progress(node: str, update: dict) -> dict:
+    progress = {"node": node}
+    update = update or {}
+    if update.get("validated_query") or update.get("query"):
+        progress["sql"] = update.get("validated_query") or update.get("query")
+    if node in EXECUTE_NODES:
+        results = update.get("results")
+        progress["row_count"] = len(results) if isinstance(results, list) else None
+    return progress
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    # Same contract as /query, delivered as Server-Sent Events:
+    # "node" after each graph node, "token" for each answer chunk, then "done" with the /query response body
+    check_approval(request)
+    if request.thread_id and request.human_verified is not None:
+        thread_id = request.thread_id
+        config = {"configurable": {"thread_id": thread_id}}
+        try:
+            claimed = await crud_agent.aclaim(thread_id)
+        except ApprovalConflict as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        if not claimed:
+            raise HTTPException(status_code=404, detail="No pending operation for this thread_id")
+        graph, graph_input = crud_agent.app, Command(resume=request.human_verified)
+    else:
+        # A new run streams from the draft graph, which saves no checkpoints; apause below keeps a CUD run for approval
+        thread_id = str(uuid.uuid4())
+        config = None
+        graph, graph_input = crud_agent.draft_app, build_initial_state(request)
+
+    async def events():
+        values = {}
+        try:
+            async for mode, chunk in graph.astream(graph_input, config, stream_mode=["updates", "messages", "values"]):
+                if mode == "values":
+                    values = chunk
+                elif mode == "updates":
+                    for node, update in chunk.items():
+                        if node != "__interrupt__":
+                            yield sse_event("node", node_progress(node, update))
+                else:
+                    message, metadata = chunk
+                    if metadata.get("langgraph_node") in ANSWER_NODES and message.content:
+                        yield sse_event("token", {"text": message.content})
+        except BaseException:
+            # A failed or abandoned resume gives the approval back, so it can be retried
+            if isinstance(graph_input, Command):
+                await crud_agent.arelease(thread_id)
+            raise
+        if isinstance(graph_input, Command):
+            await crud_agent.asettle(thread_id)
+        else:
+            values = await crud_agent.apause(values, thread_id)
+        yield sse_event("done", build_response(values, thread_id))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from langchain_core.messages import AIMessage
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Module settings are read at import, so the test databases are chosen before any app module is imported
+_workdir = tempfile.mkdtemp(prefix="agentic-tests-")
+subprocess.run([sys.executable, os.path.join(ROOT, "db", "create_tables.py")], cwd=_workdir, check=True, capture_output=True)
+os.environ.update(
+    DB_PATH=os.path.join(_workdir, "data", "apps.db"),
+    CHECKPOINT_DB_PATH=os.path.join(_workdir, "data", "checkpoints.db"),
+    LLM_CACHE_PATH=os.path.join(_workdir, "data", "llm_cache.db"),
+    LLM_CACHE_ENABLED="0",
+    OPENAI_API_KEY="test",
+)
+
+
+class ScriptedModel:
+    # Answers each prompt the graph sends for one write: the intent, the SQL (plain or self-checked) and a summary
+    def __init__(self, intent: str, sql: str):
+        self.intent = intent
+        self.sql = sql
+
+    def invoke(self, prompt, **kwargs):
+        text = str(prompt)
+        if "classify the intended database operation" in text:
+            return AIMessage(content=self.intent)
+        if '"verdict"' in text:
+            return AIMessage(content=f'{{"sql": "{self.sql}", "verdict": "valid"}}')
+        if "SQL" in text and "Data:" not in text:
+            return AIMessage(content=self.sql)
+        return AIMessage(content="Done.")
+
+    async def ainvoke(self, prompt, **kwargs):
+        return self.invoke(prompt, **kwargs)
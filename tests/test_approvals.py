@@ -0,0 +1,95 @@
+import asyncio
+import os
+import sqlite3
+import uuid
+
+import pytest
+
+import core.llm
+from agents.graph import AgenticCRUDApp, ApprovalConflict
+from db.checkpoints import async_sqlite_checkpointer, asweep_threads
+from tests.conftest import ScriptedModel
+
+EMAIL = f"zed.{uuid.uuid4().hex[:8]}@example.com"
+INSERT = f"INSERT INTO users (name, email, is_active, created_at) VALUES ('Zed Test', '{EMAIL}', 1, '2025-01-01T00:00:00')"
+
+
+def _script(monkeypatch, intent: str, sql: str):
+    monkeypatch.setattr(core.llm, "build_chat_model", lambda spec: ScriptedModel(intent, sql))
+    core.llm.reset_models()
+
+
+@pytest.fixture
+def scripted_llm(monkeypatch):
+    _script(monkeypatch, "create", INSERT)
+    yield
+    core.llm.reset_models()
+
+
+def _checkpoints(thread_id: str) -> int:
+    conn = sqlite3.connect(os.environ["CHECKPOINT_DB_PATH"])
+    count = conn.execute("SELECT COUNT(*) FROM checkpoints WHERE thread_id = ?", (thread_id,)).fetchone()[0]
+    conn.close()
+    return count
+
+
+def _run(scenario):
+    async def wrapped():
+        checkpointer = await async_sqlite_checkpointer()
+        try:
+            return await scenario(AgenticCRUDApp(checkpointer=checkpointer), checkpointer)
+        finally:
+            await checkpointer.conn.close()
+
+    return asyncio.run(wrapped())
+
+
+def _state(text: str) -> dict:
+    return {
+        "input": text, "intent": None, "query": None, "validated_query": None, "results": None, "columns": None,
+        "next_cursor": None, "answer": None, "formatter": None, "human_verified": None,
+        "verification_required": False, "intermediate_steps": [],
+    }
+
+
+def test_concurrent_approvals_execute_once(scripted_llm):
+    thread_id = str(uuid.uuid4())
+
+    async def scenario(agent, checkpointer):
+        paused = await agent.arun(_state("Add a user named Zed Test"), thread_id)
+        assert paused["verification_required"] and paused["validated_query"] == INSERT
+        return await asyncio.gather(*(agent.aresume(thread_id, True) for _ in range(4)), return_exceptions=True)
+
+    outcomes = _run(scenario)
+
+    completed = [outcome for outcome in outcomes if isinstance(outcome, dict)]
+    assert len(completed) == 1
+    assert all(outcome is None or isinstance(outcome, ApprovalConflict) for outcome in outcomes if outcome is not completed[0])
+    conn = sqlite3.connect(os.environ["DB_PATH"])
+    assert conn.execute("SELECT COUNT(*) FROM users WHERE email = ?", (EMAIL,)).fetchone()[0] == 1
+    conn.close()
+    # Approved and finished: nothing left to resume, so nothing is kept
+    assert _checkpoints(thread_id) == 0
+
+
+def test_only_paused_runs_keep_checkpoints(monkeypatch):
+    read_thread, paused_thread = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def scenario(agent, checkpointer):
+        _script(monkeypatch, "read", "SELECT COUNT(*) FROM users")
+        await agent.arun(_state("How many users are there?"), read_thread)
+        # A READ runs on the draft graph, so it never registers a thread for the sweep either
+        async with checkpointer.conn.execute("SELECT COUNT(*) FROM checkpoint_threads WHERE thread_id = ?", (read_thread,)) as cursor:
+            assert (await cursor.fetchone())[0] == 0
+        _script(monkeypatch, "create", INSERT)
+        await agent.arun(_state("Add a user named Zed Test"), paused_thread)
+        kept = _checkpoints(paused_thread)
+        swept = await asweep_threads(checkpointer, ttl=0)
+        return kept, swept
+
+    kept, swept = _run(scenario)
+    core.llm.reset_models()
+
+    assert _checkpoints(read_thread) == 0
+    assert kept > 0 and swept >= 1
+    assert _checkpoints(paused_thread) == 0
@@ -0,0 +1,23 @@
+import pytest
+
+from db import columnar
+from db.columnar import ColumnarEngine
+
+
+def test_small_tables_never_start_a_snapshot():
+    engine = ColumnarEngine()
+    assert not engine.routes("SELECT COUNT(*) FROM users")
+    assert not engine._refreshing and engine.refreshes == 0
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT CAST(AVG(price) AS INTEGER) FROM products",
+    "SELECT MAX(price, 10), COUNT(*) FROM products",
+    "SELECT COUNT(*) FROM users WHERE 1 = '1'",
+])
+def test_sqlite_only_semantics_stay_on_sqlite(sql, monkeypatch):
+    # Even with no size threshold, these must not reach DuckDB, whose results differ or which rejects them
+    monkeypatch.setattr(columnar, "COLUMNAR_MIN_ROWS", 0)
+    engine = ColumnarEngine()
+    assert not engine.routes(sql)
+    assert not engine._refreshing
@@ -0,0 +1,23 @@
+import pytest
+
+from core.intent import classify_intent
+
+
+@pytest.mark.parametrize("text", [
+    "Create a report of orders by month",
+    "Generate a summary of revenue per category",
+    "Make me a monthly breakdown of sign-ups",
+])
+def test_report_requests_never_take_the_create_path(text):
+    # A report is a read; the rules must at least leave it to the LLM rather than classify it as create
+    result = classify_intent(text)
+    assert result is None or result[0] == "read"
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("Create an order for user 3 buying 2 units of product 7", "create"),
+    ("Add a new user named John with email john@example.com", "create"),
+    ("Create a new product called Sales Report Binder", "create"),
+])
+def test_plain_creates_stay_on_the_fast_path(text, intent):
+    assert classify_intent(text)[0] == intent
@@ -0,0 +1,9 @@
+from db.pagination import fetch_page
+
+
+def test_page_of_sql_ending_in_comment():
+    # The validator's repair loop leaves -- notes on SQL; wrapping must not comment out the closing parenthesis
+    sql = "SELECT name FROM sqlite_master WHERE type = 'table'\n-- Problems found by the SQLite validator: none"
+    rows, columns, has_more = fetch_page(sql, 0, 50)
+    assert columns == ["name"]
+    assert rows and not has_more
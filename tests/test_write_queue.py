@@ -0,0 +1,72 @@
+import sqlite3
+from concurrent.futures import Future
+
+import pytest
+
+from db import guardrails
+from db.guardrails import Budget, BudgetExceeded
+from db.write_queue import WriteQueue
+
+SLOW_UPDATE = (
+    "UPDATE t SET v = v + 1 WHERE id IN "
+    "(WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c LIMIT 5000000) SELECT x FROM c)"
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "apps.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER)")
+    conn.execute("INSERT INTO t (id, v) VALUES (1, 0)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_interrupted_statement_fails_alone(db_path, monkeypatch):
+    monkeypatch.setitem(guardrails.BUDGETS, "update", Budget(timeout_ms=0, max_steps=10_000, max_rows=0, max_affected=0))
+    writer = WriteQueue(db_path, window_ms=500)
+    statements = [
+        ("INSERT INTO t (id, v) VALUES (2, 0)", None),
+        (SLOW_UPDATE, "update"),
+        ("INSERT INTO t (id, v) VALUES (3, 0)", None),
+    ]
+    futures = []
+    # Queued directly so all three land in one batch, in this order
+    for sql, intent in statements:
+        future = Future()
+        writer._queue.put((sql, intent, future))
+        futures.append(future)
+
+    assert futures[0].result(timeout=10) == 1
+    with pytest.raises(BudgetExceeded) as tripped:
+        futures[1].result(timeout=10)
+    assert tripped.value.budget == "steps"
+    assert futures[2].result(timeout=10) == 1
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT id, v FROM t ORDER BY id").fetchall() == [(1, 0), (2, 0), (3, 0)]
+    conn.close()
+
+
+def test_unopenable_database_raises_to_caller(tmp_path):
+    with pytest.raises(sqlite3.OperationalError):
+        WriteQueue(str(tmp_path / "missing" / "apps.db"))
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_dead_writer_fails_pending_and_new_statements(db_path, monkeypatch):
+    writer = WriteQueue(db_path, window_ms=50)
+
+    def crash(conn, batch):
+        raise MemoryError("writer crashed")
+
+    monkeypatch.setattr(writer, "_commit", crash)
+    with pytest.raises(RuntimeError, match="writer thread has stopped"):
+        writer.execute("INSERT INTO t (id, v) VALUES (2, 0)", "create")
+    writer._thread.join(timeout=10)
+    assert not writer.alive()
+    # Refused at once instead of waiting on a thread that will never pick it up
+    with pytest.raises(RuntimeError, match="writer thread has stopped"):
+        writer.execute("INSERT INTO t (id, v) VALUES (3, 0)", "create")